@@ -0,0 +1,156 @@
+"""Mesure hors ligne des étapes de publication, sur les CSV synthétiques de benchmarks.donnees.
+
+Étapes : parsing (functions._spf_schemas), ingestion incrémentale (functions._spf_ingestion), agrégation du cube
+(model.cube_hospitalisation), rendu des graphiques (model.covid_hospitalisation, model.covid_vaccin_age)
+et encodage du Gif (functions._gif). Les durées sont celles de functions._timer.mesure().
+
+Usage, depuis la racine du dépôt :
+    python -m benchmarks.bench                                  # Affiche les médianes
+    python -m benchmarks.bench --enregistrer                    # ... et les écrit dans benchmarks/resultats/<version>.json
+    python -m benchmarks.bench --reference benchmarks/resultats/<version>.json  # Code de sortie 1 si régression
+
+benchmarks/resultats/reference.json est la référence versionnée. Les durées dépendent de la machine :
+pour comparer ailleurs, enregistrer d'abord une référence sur cette machine, à partir de la version précédente.
+Sans le module privé settings du bot, les valeurs de benchmarks.parametres sont utilisées.
+"""
+
+
+import argparse, datetime, io, json, platform, subprocess, sys
+from pathlib import Path
+
+import matplotlib
+matplotlib.use('Agg')
+
+from benchmarks import donnees
+
+try:
+    import settings  # noqa: F401  # Module privé du bot, absent d'un dépôt cloné
+except ModuleNotFoundError:
+    from benchmarks import parametres
+    sys.modules['settings'] = parametres
+
+from functions._gif import GifRotation
+from functions._spf_ingestion import ingerer
+from functions._spf_schemas import SCHEMAS
+from functions._timer import mesure, mesures
+from functions._zones import REGION_PAR_DEPARTEMENT
+from model.covid_hospitalisation import DICT_COORD_Y, Hopital
+from model.covid_vaccin_age import PositiviteModele, VaccinModele
+from model.cube_hospitalisation import CubeHospitalisation
+
+
+RESULTATS_DIR = Path(__file__).parent / 'resultats'
+TOLERANCE = .2  # Une étape régresse si sa médiane dépasse celle de la référence de plus de 20 %
+ZONE_RENDU = '92'
+
+
+def version() -> str:
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'inconnue'
+
+
+def preparer() -> dict:
+    '''Octets CSV de chaque jeu synthétique, générés une fois (hors mesures).'''
+    return {nom: donnees.csv(fonction()) for nom, (fonction, _) in donnees.JEUX.items()}
+
+
+def iteration(csvs) -> None:
+    """Une exécution de toutes les étapes."""
+    dfs = dict()
+    for nom, (_, (schema, zone)) in donnees.JEUX.items():
+        with mesure(f'parsing:{nom}'):
+            dfs[nom] = SCHEMAS[schema].lire_csv(io.BytesIO(csvs[nom]), zone)
+
+    # Ingestion d'un nouveau jour, sur le plus gros fichier
+    df = dfs['hospitalisation']
+    ancien = df[df['jour'] < df['jour'].max()]
+    with mesure('ingestion'):
+        ingestion = ingerer(ancien, df, SCHEMAS['hospitalisation'].cles_ingestion('dep'), 'dep')
+
+    cube = CubeHospitalisation(regions=REGION_PAR_DEPARTEMENT)
+    with mesure('agregation'):
+        cube.construire(ancien)
+    with mesure('agregation_incrementale'):
+        cube.mettre_a_jour(ingestion)
+
+    # Rendus dans le processus courant : seules les étapes du modèle sont mesurées.
+    images = list()
+    hopital = Hopital(cube.zone('dep', ZONE_RENDU).reset_index()[['jour', *DICT_COORD_Y]], 'Hauts-de-Seine', None,
+                      '#FBE3E1')
+    with mesure('rendu:hospitalisation'):
+        images.append(hopital.dessiner()[0])
+    for nom, classe, couleur in (('vacsi-a-dep', VaccinModele, '#E3FFFF'),
+                                 ('sp-pos-quot-dep', PositiviteModele, '#fdf2ff')):
+        df = dfs[nom]
+        df = df[df['dep'] == ZONE_RENDU]
+        df = df[df['jour'] >= str(df['jour'].unique()[-45])]  # Comme AgeModele.creer_image()
+        modele = classe(df[['jour', classe.CLAGE, *classe.DICT_MAIN]], couleur, 'dans les', 'Hauts-de-Seine')
+        with mesure(f'rendu:{nom}'):
+            images.append(modele.dessiner()[0])
+
+    with mesure('gif'):
+        gif = GifRotation(duree=10)
+        for image in images:
+            gif.ajouter(image)
+        gif.enregistrer(io.BytesIO())
+
+
+def executer(repetitions) -> dict:
+    """Returns:
+        resultats (dict): {étape: {'mediane': s, 'min': s, 'p95': s}} pour les étapes de premier niveau.
+    """
+    csvs = preparer()
+    mesures.histogrammes.clear()
+    mesures.vider()
+    for _ in range(repetitions):
+        iteration(csvs)
+    etapes = {chemin[0] for chemin, _ in mesures.vider()}
+    return {etape: {'mediane': histogramme.quantile(.5), 'min': min(histogramme.echantillons),
+                    'p95': histogramme.quantile(.95)}
+            for etape, histogramme in sorted(mesures.histogrammes.items()) if etape in etapes}
+
+
+def comparer(resultats, reference, tolerance=TOLERANCE) -> list:
+    '''Étapes dont la médiane dépasse celle de la référence au-delà de la tolérance.'''
+    regressions = list()
+    for etape, valeurs in resultats.items():
+        if etape in reference and valeurs['mediane'] > reference[etape]['mediane'] * (1 + tolerance):
+            regressions.append((etape, reference[etape]['mediane'], valeurs['mediane']))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repetitions', type=int, default=5)
+    parser.add_argument('--enregistrer', action='store_true', help='Écrit les résultats dans benchmarks/resultats/')
+    parser.add_argument('--reference', type=Path, help='Résultats à comparer, par ex. ceux de la version précédente')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    resultats = executer(args.repetitions)
+    for etape, valeurs in resultats.items():
+        print(f"{etape:<32} médiane {valeurs['mediane']:8.3f} s   min {valeurs['min']:8.3f} s   "
+              f"p95 {valeurs['p95']:8.3f} s")
+
+    if args.enregistrer:
+        RESULTATS_DIR.mkdir(exist_ok=True)
+        chemin = RESULTATS_DIR / f'{version()}.json'
+        chemin.write_text(json.dumps({'version': version(), 'date': datetime.datetime.now().isoformat(),
+                                      'python': platform.python_version(), 'repetitions': args.repetitions,
+                                      'etapes': resultats}, indent=2), encoding='utf-8')
+        print(f'Résultats enregistrés : {chemin}')
+
+    if args.reference:
+        reference = json.loads(args.reference.read_text(encoding='utf-8'))['etapes']
+        regressions = comparer(resultats, reference, args.tolerance)
+        for etape, avant, apres in regressions:
+            print(f'RÉGRESSION {etape} : {avant:.3f} s -> {apres:.3f} s ({apres / avant - 1:+.0%})')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
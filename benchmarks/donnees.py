@@ -0,0 +1,100 @@
+"""CSV synthétiques au format de Santé publique France, pour mesurer les performances hors ligne.
+
+Mêmes colonnes, séparateur, zones (functions._zones) et tranches d'âges que les fichiers publiés sur data.gouv.fr,
+avec des volumes comparables. Les valeurs sont tirées d'un générateur à graine fixe : deux appels identiques
+produisent les mêmes octets.
+"""
+
+
+import io
+
+import numpy as np
+import pandas as pd
+
+from functions._zones import CODE_FRANCE, DEPARTEMENTS, REGIONS
+
+
+JOUR_DEBUT = '2020-03-18'
+NB_JOURS = 830  # Jusqu'à fin juin 2022, comme les fichiers publiés
+GRAINE = 2020
+
+CLAGE_VACSI = (0, 4, 9, 11, 17, 24, 29, 39, 49, 59, 64, 69, 74, 79, 80)
+CL_AGE90 = (0, 9, 19, 29, 39, 49, 59, 69, 79, 89, 90)
+SEXES = (0, 1, 2)
+
+
+def zones(niveau) -> list:
+    return {'fra': [CODE_FRANCE], 'reg': [*REGIONS], 'dep': [*DEPARTEMENTS]}[niveau]
+
+
+def jours(nb_jours=NB_JOURS) -> pd.DatetimeIndex:
+    return pd.date_range(JOUR_DEBUT, periods=nb_jours, freq='D')
+
+
+def vagues(rng, nb_jours, nb_series, echelle) -> np.ndarray:
+    """Séries positives et lisses, une par colonne : quelques vagues épidémiques plus du bruit."""
+    t = np.arange(nb_jours)[:, None]
+    phases = rng.uniform(0, 2 * np.pi, size=(1, nb_series))
+    niveaux = rng.uniform(.2, 1, size=(1, nb_series)) * echelle
+    serie = niveaux * (1.2 + np.sin(t / 60 + phases) + .4 * np.sin(t / 17 + 2 * phases))
+    return np.maximum(serie + rng.normal(0, echelle * .02, size=serie.shape), 0)
+
+
+def grille(niveau, categories, nom_categorie, nb_jours) -> pd.DataFrame:
+    '''Produit cartésien zone × catégorie × jour, dans l'ordre des fichiers publiés.'''
+    index = pd.MultiIndex.from_product([zones(niveau), categories, jours(nb_jours)],
+                                       names=[niveau, nom_categorie, 'jour'])
+    return index.to_frame(index=False)
+
+
+def hospitalisation(nb_jours=NB_JOURS, graine=GRAINE) -> pd.DataFrame:
+    '''donnees-hospitalieres-covid19 : dep;sexe;jour;hosp;rea;HospConv;SSR_USLD;autres;rad;dc'''
+    rng = np.random.default_rng(graine)
+    df = grille('dep', SEXES, 'sexe', nb_jours)
+    nb_series = len(DEPARTEMENTS) * len(SEXES)
+    for colonne, echelle in (('hosp', 800), ('rea', 120), ('HospConv', 500), ('SSR_USLD', 150), ('autres', 30)):
+        df[colonne] = vagues(rng, nb_jours, nb_series, echelle).T.ravel().round()
+    for colonne, echelle in (('rad', 20), ('dc', 4)):  # Cumuls
+        df[colonne] = vagues(rng, nb_jours, nb_series, echelle).cumsum(axis=0).T.ravel().round()
+    df['jour'] = df['jour'].dt.strftime('%Y-%m-%d')
+    return df[['dep', 'sexe', 'jour', 'hosp', 'rea', 'HospConv', 'SSR_USLD', 'autres', 'rad', 'dc']].astype(
+        {colonne: int for colonne in ('hosp', 'rea', 'HospConv', 'SSR_USLD', 'autres', 'rad', 'dc')})
+
+
+def vacsi(niveau='dep', nb_jours=NB_JOURS - 280, graine=GRAINE) -> pd.DataFrame:
+    '''vacsi-a-{niveau} : {niveau};clage_vacsi;jour;couv_dose1;couv_complet;couv_rappel (campagne débutée fin 2020)'''
+    rng = np.random.default_rng(graine)
+    df = grille(niveau, CLAGE_VACSI, 'clage_vacsi', nb_jours)
+    nb_series = len(zones(niveau)) * len(CLAGE_VACSI)
+    t = np.arange(nb_jours)[:, None]
+    plafonds = rng.uniform(60, 98, size=(1, nb_series))
+    for colonne, retard in (('couv_dose1', 0), ('couv_complet', 40), ('couv_rappel', 300)):
+        couverture = plafonds / (1 + np.exp(-(t - 120 - retard) / 30))
+        df[colonne] = couverture.T.ravel().round(1)
+    df['jour'] = df['jour'].dt.strftime('%Y-%m-%d')
+    return df[[niveau, 'clage_vacsi', 'jour', 'couv_dose1', 'couv_complet', 'couv_rappel']]
+
+
+def sp_pos_quot(niveau='dep', nb_jours=NB_JOURS - 70, graine=GRAINE) -> pd.DataFrame:
+    '''sp-pos-quot-{niveau} : {niveau};jour;P;T;cl_age90'''
+    rng = np.random.default_rng(graine)
+    df = grille(niveau, CL_AGE90, 'cl_age90', nb_jours)
+    nb_series = len(zones(niveau)) * len(CL_AGE90)
+    tests = vagues(rng, nb_jours, nb_series, 3000)
+    df['T'] = tests.T.ravel().round().astype(int)
+    df['P'] = (tests * rng.uniform(.02, .3, size=tests.shape)).T.ravel().round().astype(int)
+    df['jour'] = df['jour'].dt.strftime('%Y-%m-%d')
+    return df[[niveau, 'jour', 'P', 'T', 'cl_age90']]
+
+
+def csv(df) -> bytes:
+    '''Octets du CSV, séparateur ';' comme sur data.gouv.fr.'''
+    buffer = io.BytesIO()
+    df.to_csv(buffer, sep=';', index=False)
+    return buffer.getvalue()
+
+
+# {nom du jeu: (fonction, (nom du schéma, zone) dans functions._spf_schemas.SCHEMAS)}
+JEUX = {'hospitalisation': (hospitalisation, ('hospitalisation', 'dep')),
+        'vacsi-a-dep':     (vacsi, ('vacsi', 'dep')),
+        'sp-pos-quot-dep': (sp_pos_quot, ('sp-pos-quot', 'dep'))}
@@ -0,0 +1,15 @@
+"""Valeurs du module privé settings (non versionné) dont les modèles ont besoin, pour les benchmarks hors ligne.
+
+Aucun identifiant réel : les benchmarks ne contactent ni Discord ni la base de données.
+bench.py ne les utilise que si settings est absent.
+"""
+
+
+import locale
+
+
+MESSAGES_IDS_COVID = tuple(range(10))  # Identifiants de messages factices, indexés par les modèles
+PANDAS_SPF_SPECS = {'sep': ';', 'parse_dates': ['jour'], 'low_memory': False}
+
+locale_value = lambda x: '{:,}'.format(x).replace(',', ' ').replace('.0', ' ')  # Format des milliers
+locale_float_digits = lambda x, digits: locale.format_string(f'%.{digits}f', x, grouping=True)
@@ -0,0 +1,104 @@
+import time
+from dataclasses import dataclass
+
+from discord.ext import commands
+
+from functions._cache_rendu import cache_rendu
+from functions._cache_upload import cache_upload
+from functions._jeux_donnees import registre
+from functions._planificateur import planificateur
+from functions._rendu import file, memoire_processus, memoire_residente, pic_memoire
+from functions._single_flight import single_flight
+from functions._timer import mesures
+from view import views_embed as ve
+from settings import ROLE_CS
+
+
+TITRE = 'Perf'
+NB_ETAPES = 12  # Étapes affichées, les plus lentes (p95) d'abord
+TAILLE_CHAMP = 1024 - len(ve.FIN_CHAMP)  # Limite de Discord pour la valeur d'un champ, fin ajoutée par l'embed comprise
+COULEUR_HEX = 0x95A5A6
+
+
+def octets(nombre) -> str:
+    return '?' if nombre is None else f'{nombre / 1024 ** 2:.0f} Mo'
+
+
+def duree(secondes) -> str:
+    return '-' if secondes is None else f'{secondes:.2f}'
+
+
+@dataclass()
+class PerfCtrl(commands.Cog):
+    """Statistiques du traitement, lues dans les compteurs en mémoire : aucune mesure supplémentaire n'est lancée."""
+    bot: object
+
+    __slots__ = '__dict__',
+
+    def etapes(self) -> str:
+        histogrammes = sorted(mesures.histogrammes.items(), key=lambda item: item[1].quantile(.95) or 0, reverse=True)
+        lignes = [f"{'étape':<22}{'dern.':>7}{'p95':>7}{'n':>6}"]
+        lignes += [f'{etape[:21]:<22}{duree(histogramme.derniere):>7}{duree(histogramme.quantile(.95)):>7}'
+                   f'{histogramme.nombre:>6}'
+                   for etape, histogramme in histogrammes[:NB_ETAPES]]
+        return '```\n' + '\n'.join(lignes) + '\n```'
+
+    def caches(self) -> str:
+        compteurs = registre.fetcher.compteurs
+        return (f'Rendus : {cache_rendu.taux_succes:.0%} ({cache_rendu.succes} / {cache_rendu.succes + cache_rendu.echecs})\n'
+                f'Téléversements : {cache_upload.taux_succes:.0%} ({cache_upload.succes} / {cache_upload.succes + cache_upload.echecs})\n'
+                f'Regroupement des demandes : {single_flight.taux_regroupement:.0%} ({single_flight.appels} appels)\n'
+                f'Regroupement des actualisations : {registre.vols.taux_regroupement:.0%} ({registre.vols.appels} appels)\n'
+                f"CSV : {compteurs['memoire']} mémoire · {compteurs['304']} 304 · {compteurs['identique']} identiques · "
+                f"{compteurs['cache_disque']} disque · {compteurs['parsing']} parsés")
+
+    def files(self) -> str:
+        taches = [tache.nom for tache in planificateur.taches.values() if tache.en_cours]
+        return (f"Rendus en cours : {file['en_cours']} ({file['total']} au total)\n"
+                f'Calculs regroupés en cours : {single_flight.en_cours}\n'
+                f'Modifications de messages en attente : {ve.file_publication.profondeur}\n'
+                f"Tâches en cours : {', '.join(taches) or 'aucune'}")
+
+    def memoire(self) -> str:
+        '''Mémoire résidente actuelle, puis pic depuis le démarrage (ru_maxrss) : un pic ne baisse jamais.'''
+        texte = f'Bot : {octets(memoire_residente())} (pic : {octets(pic_memoire())})'
+        if memoires := memoire_processus():  # Relevés transmis avec les rendus : aucun processus n'est sollicité.
+            texte += ('\nProcessus de rendu, au dernier rendu : '
+                      + ', '.join(f'{octets(rss)} (pic : {octets(pic)})' for rss, pic in memoires))
+        return texte[:TAILLE_CHAMP]
+
+    def donnees(self) -> str:
+        lignes = list()
+        for url, empreinte in registre.courantes.items():
+            etat = registre.fetcher.etats.get(url)
+            nom = '/'.join(registre.schemas.get(url) or (url.rsplit('/', 1)[-1],))
+            version = registre.versions[url][empreinte]
+            verifie = f'{(time.time() - etat.verifie_le) / 60:.0f} min' if etat and etat.verifie_le else '?'
+            lignes.append(f"{nom} : vérifié il y a {verifie}, modifié le {etat.last_modified if etat else '?'}, "
+                          f'{len(registre.versions[url])} version(s), {version.refs} vue(s)')
+        return '\n'.join(lignes)[:TAILLE_CHAMP] or 'Aucun jeu de données chargé.'
+
+    @commands.command(brief='Statistiques de performance (administration)')
+    async def perf(self, ctx, *, args=None) -> None:
+        """Envoie les durées des étapes, les taux de succès des caches, les files, la mémoire et l'âge des données.
+
+        Args:
+            ctx (discord) : Référence au contexte du message entré par l'utilisateur.
+            args (str) : Ignoré. Présent uniquement au cas où l'utilisateur rentre des arguments superflus.
+        """
+        if not ve.verif_droit(ctx, ROLE_CS):
+            return
+
+        await ve.embed_send_gc(bot=self.bot,
+                               ctx=ctx,
+                               title='!perf',
+                               fields=[('⏱️ Étapes (secondes)', self.etapes(), False),
+                                       ('🗃️ Caches', self.caches(), False),
+                                       ('📥 Files', self.files(), False),
+                                       ('🧠 Mémoire', self.memoire(), False),
+                                       ('📄 Jeux de données', self.donnees(), False)],
+                               color_hex=COULEUR_HEX)
+
+
+def setup(bot):
+    bot.add_cog(PerfCtrl(bot))
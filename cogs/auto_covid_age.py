@@ -1,21 +1,35 @@
-import asyncio, datetime, imageio, os, sys
+import asyncio, datetime, io, time
 from dataclasses import dataclass
 from pathlib import Path
 
 from discord.ext import commands
 import pandas as pd
 
+from functions._cache_rendu import cache_rendu, cle_rendu, Rendu
+from functions._gif import GifRotation
+from functions._jeux_donnees import registre
 from functions._local_datetime import local_dt
-from functions._timer import timer
+from functions._planificateur import planificateur, Tache
+from functions._publications import empreinte_df
+from functions._rendu import basse_priorite
+from functions._single_flight import single_flight, SingleFlight
+from functions._timer import mesure, timer
+from functions._zones import code_zone, CODE_FRANCE, DEPARTEMENTS, titre_zones, zone_publiee, ZonePubliee
 from model import covid_age
 from view import views_embed as ve
-from settings import SALON_INFO_COVID, MESSAGES_IDS_COVID, ID_BOT, ROLE_CS, PANDAS_SPF_SPECS, LISTE_DEPARTEMENTS_INT_STRF
-# PANDAS_SPF_SPECS = {'sep': ';', 'parse_dates': ['jour'], 'low_memory': False}
+from settings import SALON_INFO_COVID, MESSAGES_IDS_COVID, ID_BOT, ROLE_CS
 
 
 URL =           'https://solidarites-sante.gouv.fr/grands-dossiers/vaccin-covid-19/'
-PATH_DIR =      covid_age.PATH_DIR
 ADMIN_KEYWORD = 'ADMIN'
+REVALIDATION =  60 * 10  # Délai en secondes pendant lequel le DF en cache est utilisé sans requête.
+PRERENDU_BUDGET = 60 * 45  # Durée maximale en secondes du pré-rendu de tous les départements
+PRERENDU_PARALLELE = 2  # Pré-rendus simultanés
+PUBLICATION_DELAI_MAX = 60 * 30  # Durée maximale en secondes de check_update, publication comprise
+
+# Pré-rendus en cours, à part des commandes utilisateur (single_flight) : une commande ne rejoint jamais
+# un rendu du pool basse priorité, et les pré-rendus ne comptent pas dans le taux de regroupement des demandes.
+prerendus = SingleFlight()
 
 
 @dataclass()
@@ -23,72 +37,96 @@ class AgeCtrl():
 
     __slots__ = '__dict__',
 
-    async def main(self, key, val) -> None:
+    def __post_init__(self):
+        for niveau, url in self.URLS_CSV.items():
+            registre.enregistrer(url, (self.SCHEMA, niveau))
+
+    async def lire_zone(self, zone) -> pd.DataFrame:
+        """Lignes d'une zone, extraites du CSV de son niveau géographique.
+
+        Raises:
+            ValueError : Zone absente du CSV, par ex. un département manquant dans l'extraction du jour.
+
+        Note:
+            Le CSV est lu depuis functions._jeux_donnees, partagé par tous les cogs. Ses lignes sont indexées
+            par zone en un seul passage, une fois par version du CSV.
+        """
+        url = self.URLS_CSV[zone.niveau]
+        async with registre.vue(url, REVALIDATION) as df:
+            # Sur une colonne :category:, map() ne convertit que les catégories.
+            positions = registre.derive(url, 'zones',
+                                        lambda df_: df_.groupby(df_[zone.niveau].map(code_zone), observed=True).indices)
+            if (lignes := positions.get(zone.code)) is None:
+                raise ValueError(f'{self.TITRE_COURT} : zone {zone.code} absente du CSV.')
+            return df.iloc[lignes]
+
+    async def main(self, zone, df=None) -> Rendu:
         """Génère les DF et les objets, puis lance le traitement des DF et des graphiques.
 
         Args:
-            key (str) : Clé dans DICT_CSV, ou string si cela vient d'une commande utilisateur.
-            val (tuple) : Dépend de key, et peut avoir un format similaire à DICT_CSV[key].
-        """
+            zone (ZonePubliee) : Zone issue de ZONES, ou créée par une commande utilisateur.
+            df (pandas.DataFrame, optionnel) : Lignes de la zone, si elles ont déjà été extraites.
+
+        Returns:
+            rendu (functions._cache_rendu.Rendu) : Image PNG, chemin et jour des données.
 
-        df = pd.read_csv(val[0], **PANDAS_SPF_SPECS)
+        Note:
+            Tant que les données de la zone n'ont pas changé, l'image est lue dans functions._cache_rendu :
+            une nouvelle version du CSV n'invalide que les zones dont les lignes ont changé.
+        """
 
-        # Modifier le type de données par colonne.
-        dict_types = dict()
-        for col in list(df.columns):
-            if col == key:                dict_types[col] = 'object'  # Dans :dep:, mélange object et int8.
-            elif col == self.CLAGE:       dict_types[col] = 'int8'
-            elif col == 'jour':           dict_types[col] = 'datetime64[ns]'
-            elif col.startswith('n_'):    dict_types[col] = 'int32'
-            elif col.startswith('couv_'): dict_types[col] = 'float64'
-        df = df.astype(dict_types, copy=False)
+        if df is None:
+            # DF lu depuis la mémoire ou le cache disque s'il n'a pas changé.
+            # Les colonnes utiles et leur type sont fixés dès le parsing par functions._spf_schemas.
+            df = await self.lire_zone(zone)
 
         # Filtrer sur les seules données utilisées
-        try:
-            zone_num = int(val[1]) if str(val[1]).isnumeric else str(val[1])
-        except ValueError as val_err:
-            zone_num = val[1]  # 'fra'
-        # Un numéro de département peut être considéré comme :str: dans certains DF, et :int: dans d'autres.
-        df = df[df[key].isin({str(zone_num), zone_num})]
-        df.drop(df[df['jour'] <= pd.Timestamp((datetime.datetime.now() - datetime.timedelta(days=60)))].index, inplace=True)
+        with mesure('filtrage'):
+            df = df[df['jour'] > pd.Timestamp((datetime.datetime.now() - datetime.timedelta(days=60)))]
+
+        cle = cle_rendu(self.MODELE.__name__, zone, empreinte_df(df))
+        if rendu := cache_rendu.lire(cle):
+            return rendu
 
         # Lancement du modèle
-        modele = self.MODELE(df, *val[2:])
-        # Générer l'image PNG et obtenir le chemin.
-        image = await modele()
-        # Ajout du jour de la màj
-        self.jour = modele.jour
-        return image
-
-    async def main_multiples(self) -> None:
-        # Réinitialisation de la liste
-        self.liste_obj = list()
-        for key, val in self.dict_csv.items():
-            image = await self.main(key, val)
-            # Ajout à la liste des images PNG en vue de générer le Gif.
-            self.liste_obj.append(image)
-            await asyncio.sleep(30)
-
-    async def creer_gif(self, path_=PATH_DIR) -> Path:
-        """Réunir les PNG en un seul Gif."""
-
-        fp_out_path = os.path.join(path_, 'images')
-        fp_out = os.path.join(fp_out_path, f'{self.GIF_NOM}.gif')
-
-        # Créer le fichier et le dossier s'ils n'existent pas
-        if not os.path.exists(fp_out_path): os.mkdir(fp_out_path)
-        if not os.path.exists(fp_out):      open(fp_out, 'x')
-
-        # Aggréger les images en Gif
-        images = list()
-        for filename in self.liste_obj:
-            images.append(imageio.imread(filename))
-            imageio.mimsave(fp_out, images, duration=self.ROTATION_TPS_GIF)
-
-        return fp_out
-
-    async def publi_embed(self, image_path) -> None:
-        """Edition du message."""
+        modele = self.MODELE(df, zone.couleur, zone.particule, zone.libelle)
+        # Générer l'image PNG.
+        await modele()
+        return cache_rendu.ecrire(cle, modele.png, modele.jour)
+
+    async def main_multiples(self) -> tuple:
+        """Rend l'image de chaque zone de ZONES.
+
+        Returns:
+            (gif, jour) (tuple): gif (functions._gif.GifRotation) propre à cet appel : une publication ADMIN
+                                 et la publication planifiée simultanées ne mélangent pas leurs images.
+        """
+        # Nouveau Gif, alimenté au fur et à mesure des rendus
+        gif = GifRotation(duree=self.ROTATION_TPS_GIF)
+        jour = None
+        # Rendus en parallèle. Chaque CSV n'est lu et indexé qu'une fois par version (lire_zone).
+        for rendu in await asyncio.gather(*(self.main(zone) for zone in self.ZONES)):
+            # Ajout de l'image PNG, en mémoire, au Gif, et du jour de la màj.
+            gif.ajouter(rendu.png)
+            jour = rendu.jour
+        return gif, jour
+
+    async def creer_gif(self, gif) -> bytes:
+        """Réunir les PNG en un seul Gif, en mémoire."""
+
+        # Palette commune puis écriture en une passe : chaque image n'est encodée qu'une fois.
+        buffer = io.BytesIO()
+        with mesure('encodage_gif'):
+            await asyncio.to_thread(gif.enregistrer, buffer)
+        return buffer.getvalue()
+
+    async def publi_embed(self, image, jour) -> None:
+        """Edition du message.
+
+        Args:
+            image (bytes): Gif, téléversé depuis la mémoire.
+            jour (str): Jour des données.
+        """
         field = [(f'🗺️ Vous souhaitez un graphique pour un autre département ?\nEnvoyez dans un salon ou par message direct à',
                   (f'<@{ID_BOT}> :ok_hand: ```!{self.NOM_COMMANDE} <numéro_département>``` \n'
                    f'Exemple : ```!{self.NOM_COMMANDE} 75```'
@@ -104,18 +142,50 @@ class AgeCtrl():
                                description=self.DESCRIPTION,
                                fields=field,
                                url=URL,
-                               footer=f"Données du {self.jour}\nSanté publique France",
-                               image_path=image_path,
+                               footer=f"Données du {jour}\nSanté publique France",
+                               image_path=image,
                                color_hex=self.COULEUR_HEX)
-        await asyncio.sleep(60 * 30)
 
     async def launch_main_embed(self) -> None:
         """Créer les PNG puis le Gif."""
 
-        await self.main_multiples()
-        fp_out = await self.creer_gif()
-        setattr(self, 'image_path', fp_out)
-        await self.publi_embed(fp_out)
+        gif, jour = await self.main_multiples()
+        await self.publi_embed(await self.creer_gif(gif), jour)
+
+    def zone_commande(self, code) -> ZonePubliee:
+        """Zone d'un département demandé par commande utilisateur, identique pour tous les utilisateurs."""
+        code = code_zone(code)
+        return ZonePubliee('dep', code, code, self.COULEUR_COMMANDE, 'dans')
+
+    async def prerendre(self) -> None:
+        """Pré-rend le graphique de chaque département dans functions._cache_rendu, à faible priorité.
+
+        Note:
+            Déclenché par functions._planificateur à chaque nouvelle version du CSV départemental, pour que
+            les commandes utilisateur soient servies depuis le cache. Les départements non traités dans le budget de temps restent rendus à la demande.
+            Le budget est vérifié avant chaque rendu : un rendu qui le dépasserait, d'après le plus long déjà observé,
+            n'est pas commencé. Le pré-rendu s'arrête donc de lui-même, sans être annulé au milieu d'un rendu.
+        """
+        debut = time.monotonic()
+        duree_max = 0.  # Plus long rendu observé, en secondes
+        semaphore = asyncio.Semaphore(PRERENDU_PARALLELE)
+        basse_priorite.set(True)  # Hérité par les tâches créées ci-dessous
+
+        async def prerendre_departement(code) -> bool:
+            nonlocal duree_max
+            async with semaphore:
+                if time.monotonic() - debut + duree_max > PRERENDU_BUDGET:
+                    return False
+                depart = time.monotonic()
+                zone = self.zone_commande(code)
+                await prerendus((self.NOM_COMMANDE, zone), lambda: self.main(zone))
+                duree_max = max(duree_max, time.monotonic() - depart)
+                return True
+
+        resultats = await asyncio.gather(*(prerendre_departement(code) for code in DEPARTEMENTS), return_exceptions=True)
+        erreurs = [err for err in resultats if isinstance(err, Exception)]
+        print(f'{self.TITRE_COURT} : pré-rendu en {time.monotonic() - debut:.0f} s, {len(erreurs)} erreur(s), '
+              f'{resultats.count(False)} département(s) hors budget.')
 
     async def commande_utilisateur(self, ctx, zone) -> None:
         """Lance le programme manuellement via une entrée utilisateur sur Discord.
@@ -138,18 +208,17 @@ class AgeCtrl():
                 await self.launch_main_embed()
 
             else:
-                if zone in LISTE_DEPARTEMENTS_INT_STRF:
-                    zone_lettres = 'dep'
-                    zone_tuple = (self.DICT_CSV['dep'][0], zone, self.DICT_CSV['dep'][2], 'dans', str(zone))
+                if code_zone(zone) in DEPARTEMENTS:
+                    zone_publiee = self.zone_commande(zone)
                     contenu = f'Voici l\'info pour : {zone}'
                 else:  # France
-                    zone_lettres = 'fra'
-                    zone_tuple = (self.DICT_CSV['fra'])
+                    zone_publiee = next(zone_ for zone_ in self.ZONES if zone_.niveau == 'fra')
                     contenu = f'Voici l\'info pour la France.\n' \
                               f'Si vous souhaitez un département, ' \
                               f'envoyez `!{self.NOM_COMMANDE} <numero_departement>`.\n' \
                               f'Par exemple `!{self.NOM_COMMANDE} 75`'
-                image = await self.main(zone_lettres, zone_tuple)
+                # Les demandes simultanées pour la même zone partagent un seul calcul.
+                rendu = await single_flight((self.NOM_COMMANDE, zone_publiee), lambda: self.main(zone_publiee))
 
                 # Todo : Ajouter limite de temps
                 await ve.embed_send_gc(bot=self.bot,
@@ -157,9 +226,9 @@ class AgeCtrl():
                                        title=f'!{self.NOM_COMMANDE}',
                                        fields=[('\u200b', contenu, False)],
                                        url=URL,
-                                       footer=f"Données du {self.jour}\nSanté publique France",
+                                       footer=f"Données du {rendu.jour}\nSanté publique France",
                                        color_hex=self.COULEUR_HEX,
-                                       file=(image, f'{self.TITRE_COURT}-{zone}.png'))
+                                       file=(io.BytesIO(rendu.png), f'{self.TITRE_COURT}-{zone}.png'))
 
                 # Todo : Logs anonymes
                 from settings import SALON_TEST_ADMIN
@@ -168,9 +237,9 @@ class AgeCtrl():
                                        title=f'!{self.NOM_COMMANDE}',
                                        fields=[('\u200b', contenu, False)],
                                        url=URL,
-                                       footer=f"Données du {self.jour}\nSanté publique France",
+                                       footer=f"Données du {rendu.jour}\nSanté publique France",
                                        color_hex=self.COULEUR_HEX,
-                                       file=(image, f'{self.TITRE_COURT}-{zone}.png'))
+                                       file=(io.BytesIO(rendu.png), f'{self.TITRE_COURT}-{zone}.png'))
 
         except ValueError:
             raise ValueError(('La zone doit correspondre au numéro du département souhaité.'
@@ -187,43 +256,45 @@ class AgeCtrl():
 
         try:
             # On vérifie la date de màj à partir d'un des CSV.
-            url = self.dict_csv['fra'][0]
-            df = pd.read_csv(url, sep=';', parse_dates=['jour'])
-
-            # On détermine si le jour des données du CSV (=la veille) correspond au jour recherché (=la veille).
+            url = self.URLS_CSV['fra']
+            dt_local_time = await local_dt()
             date_attendue = (dt_local_time - datetime.timedelta(days=self.DAYS_DELTA)).date()
-            date_obtenue = datetime.datetime.strptime(str(df['jour'].max()),
-                                                      '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d')  # Jour issu du CSV
+
+            # Sonde : seule la fin du CSV est lue. None si le serveur ne le permet pas.
+            date_sonde = await registre.fetcher.dernier_jour(url)
+            assert date_sonde in {None, date_attendue}, \
+                (f'{self.TITRE_COURT} : La date demandée est indisponible. {date_attendue = }; {date_sonde = }')
+
+            # Requête conditionnelle : le CSV n'est téléchargé et parsé que s'il a changé.
+            async with registre.vue(url, revalidation=0) as df:
+                # On détermine si le jour des données du CSV (=la veille) correspond au jour recherché (=la veille).
+                date_obtenue = datetime.datetime.strptime(str(df['jour'].max()),
+                                                          '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d')  # Jour issu du CSV
 
             # Si ces deux jours ne correspondent pas, attendre 30 min puis relancer la requête.
             assert str(date_attendue) == str(date_obtenue), \
                 (f'{self.TITRE_COURT} : La date demandée est indisponible. {date_attendue = }; {date_obtenue = }')
 
             # Si ces deux jours correspondent, la requête peut être lancée, et puis interrompue jusqu'à demain.
-            setattr(self, 'jour', date_attendue)
-            setattr(self, 'vaccination_fra', df)
             await self.launch_main_embed()
-            await asyncio.sleep(3600 * 6)  # 6 heures
 
         except AssertionError as err:
             raise AssertionError(err)
 
     @commands.Cog.listener()
     async def on_ready(self) -> None:
-        '''Envoi du nombre de vaccinés dans le salon #covid.'''
-
-        running = True
-        while running:
-            global dt_local_time
-            dt_local_time = await local_dt()
-            try:
-                if 18 <= dt_local_time.hour <= 23 and dt_local_time.minute in self.MINUTES_VERIF:
-                    await self.check_update()
-            except Exception as err:
-                exc_type, exc_obj, exc_tb = sys.exc_info()
-                fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
-                print(self.TITRE_COURT, err, exc_type, fname, exc_tb.tb_lineno)
-            await asyncio.sleep(55)
+        '''Planifie l'envoi du graphique dans le salon #covid, et le pré-rendu à chaque nouveau CSV départemental.'''
+        planificateur.ajouter(Tache(f'{self.TITRE_COURT}-check_update', self.check_update,
+                                    heures=range(18, 24), minutes=self.MINUTES_VERIF, jitter=20,
+                                    delai_max=PUBLICATION_DELAI_MAX, une_fois_par_jour=True))
+        planificateur.ajouter(Tache(f'{self.TITRE_COURT}-prerendu', self.prerendre, urls=(self.URLS_CSV['dep'],),
+                                    delai_max=PRERENDU_BUDGET + 60, remplacer=True))
+        planificateur.demarrer()
+        # Message à modifier, résolu une fois par connexion (view.views_embed.CacheMessages)
+        try:
+            await ve.cache_messages.resoudre(self.bot, [(SALON_INFO_COVID, self.MESSAGE_ID)])
+        except Exception as err:
+            print(self.TITRE_COURT, err)
 
 
 @dataclass()
@@ -231,7 +302,6 @@ class VaccinCtrl(commands.Cog, AgeCtrl):
 
     bot: object
 
-    TITRE_LONG = 'Vaccination par âge : France · IDF · 92'  # Nom de l'embed
     TITRE_COURT = 'Vaccin_Age'  # Nom de l'image PNG et utilisé dans certaines Exception
     GIF_NOM = 'Vaccination'  # Nom de l'image Gif
     DESCRIPTION = 'actualisé vers 20h-23h\n(du lundi au vendredi)'
@@ -242,13 +312,16 @@ class VaccinCtrl(commands.Cog, AgeCtrl):
     MODELE = covid_age.VaccinModele
     NOM_COMMANDE = 'vaccin'
     DAYS_DELTA = 1
-    DICT_CSV = {'fra': ('https://www.data.gouv.fr/fr/datasets/r/54dd5f8d-1e2e-4ccb-8fb8-eac68245befd', 'FR', '#70E6E4', 'en', 'France'),
-                'reg': ('https://www.data.gouv.fr/fr/datasets/r/c3ccc72a-a945-494b-b98d-09f48aa25337', 11, '#c7faff', 'en', 'Île-de-France'),
-                'dep': ('https://www.data.gouv.fr/fr/datasets/r/83cbbdb9-23cb-455e-8231-69fc25d58111', 92, '#E3FFFF', 'dans les', 'Hauts-de-Seine')}
-    dict_csv = DICT_CSV
+    URLS_CSV = {'fra': 'https://www.data.gouv.fr/fr/datasets/r/54dd5f8d-1e2e-4ccb-8fb8-eac68245befd',
+                'reg': 'https://www.data.gouv.fr/fr/datasets/r/c3ccc72a-a945-494b-b98d-09f48aa25337',
+                'dep': 'https://www.data.gouv.fr/fr/datasets/r/83cbbdb9-23cb-455e-8231-69fc25d58111'}
+    ZONES = (zone_publiee('fra', CODE_FRANCE, '#70E6E4'),  # Une image du Gif par zone, voir functions._zones
+             zone_publiee('reg', '11', '#c7faff'),
+             zone_publiee('dep', '92', '#E3FFFF', particule='dans les'))
+    TITRE_LONG = f'Vaccination par âge : {titre_zones(ZONES)}'  # Nom de l'embed
+    COULEUR_COMMANDE = '#E3FFFF'  # Pour un département demandé par commande utilisateur
     CLAGE = 'clage_vacsi'  # Colonne qui contient le classement par tranche d'âges
-
-    liste_obj = list()  # Chemins pour le gif
+    SCHEMA = 'vacsi'  # Dans functions._spf_schemas.SCHEMAS
 
     @commands.command(brief='Vaccination par âge contre la Covid-19', aliases=['vaccin_age', 'vaccination'])
     async def vaccin(self, ctx, zone=None, *, args=None) -> None:  # @commands.check_any(commands.has_role(ROLE_CS))
@@ -267,7 +340,6 @@ class PositiviteCtrl(commands.Cog, AgeCtrl):
 
     bot: object
 
-    TITRE_LONG = 'Personnes testées et personnes positives quotidiennement par âge : France · IDF · 92'  # Nom de l'embed
     TITRE_COURT = 'Positivite_Age'  # Nom de l'image PNG et utilisé dans certaines Exception
     GIF_NOM = 'Positivite'  # Nom de l'image Gif
     DESCRIPTION = 'actualisé vers 20h-23h'
@@ -278,13 +350,16 @@ class PositiviteCtrl(commands.Cog, AgeCtrl):
     MODELE = covid_age.PositiviteModele
     NOM_COMMANDE = 'positif'
     DAYS_DELTA = 3
-    DICT_CSV = {'fra': ('https://www.data.gouv.fr/fr/datasets/r/dd0de5d9-b5a5-4503-930a-7b08dc0adc7c', 'FR', '#feb8ff', 'en', 'France'),              # sp-pos-quot
-                'reg': ('https://www.data.gouv.fr/fr/datasets/r/001aca18-df6a-45c8-89e6-f82d689e6c01', 11, '#fed6ff', 'en', 'Île-de-France'),         # sp-pos-quot
-                'dep': ('https://www.data.gouv.fr/fr/datasets/r/406c6a23-e283-4300-9484-54e78c8ae675', 92, '#fdf2ff', 'dans les', 'Hauts-de-Seine')}  # sp-pos-quot
-    dict_csv = DICT_CSV
+    URLS_CSV = {'fra': 'https://www.data.gouv.fr/fr/datasets/r/dd0de5d9-b5a5-4503-930a-7b08dc0adc7c',  # sp-pos-quot
+                'reg': 'https://www.data.gouv.fr/fr/datasets/r/001aca18-df6a-45c8-89e6-f82d689e6c01',  # sp-pos-quot
+                'dep': 'https://www.data.gouv.fr/fr/datasets/r/406c6a23-e283-4300-9484-54e78c8ae675'}  # sp-pos-quot
+    ZONES = (zone_publiee('fra', CODE_FRANCE, '#feb8ff'),  # Une image du Gif par zone, voir functions._zones
+             zone_publiee('reg', '11', '#fed6ff'),
+             zone_publiee('dep', '92', '#fdf2ff', particule='dans les'))
+    TITRE_LONG = f'Personnes testées et personnes positives quotidiennement par âge : {titre_zones(ZONES)}'  # Nom de l'embed
+    COULEUR_COMMANDE = '#fdf2ff'  # Pour un département demandé par commande utilisateur
     CLAGE = 'cl_age90'  # Colonne qui contient le classement par tranche d'âges
-
-    liste_obj = list()  # Chemins pour le gif
+    SCHEMA = 'sp-pos-quot'  # Dans functions._spf_schemas.SCHEMAS
 
     @commands.command(brief='Tests positifs quotidiens par âge contre la Covid-19', aliases=['positifs', 'positivite', 'positivite_age'])
     async def positif(self, ctx, zone=None, *, args=None) -> None:  # @commands.check_any(commands.has_role(ROLE_CS))
@@ -312,7 +387,6 @@ if __name__ == '__main__':
     class TestCtrl(AgeCtrl):
 
         TITRE_COURT = 'Positivite_Age'
-        TITRE_LONG = 'Personnes testées et personnes positives quotidiennement par âge : France · IDF · 92'
         DESCRIPTION = 'actualisé vers 20h-23h'
         MESSAGE_ID = MESSAGES_IDS_COVID[7]
         MINUTES_VERIF = {22, 52}
@@ -320,20 +394,23 @@ if __name__ == '__main__':
         COULEUR_HEX = 0xdf03fc
         MODELE = covid_age.PositiviteModele
         NOM_COMMANDE = 'positif'
-        DICT_CSV = {'fra': ('https://www.data.gouv.fr/fr/datasets/r/dd0de5d9-b5a5-4503-930a-7b08dc0adc7c', 'FR', '#f5d1ff', 'en', 'France'),              # sp-pos-quot
-                    'reg': ('https://www.data.gouv.fr/fr/datasets/r/001aca18-df6a-45c8-89e6-f82d689e6c01', 11, '#f9e3ff', 'en', 'Île-de-France'),         # sp-pos-quot
-                    'dep': ('https://www.data.gouv.fr/fr/datasets/r/406c6a23-e283-4300-9484-54e78c8ae675', 92, '#fcf0ff', 'dans les', 'Hauts-de-Seine')}  # sp-pos-quot
-        dict_csv = DICT_CSV
+        URLS_CSV = PositiviteCtrl.URLS_CSV
+        ZONES = (zone_publiee('fra', CODE_FRANCE, '#f5d1ff'),
+                 zone_publiee('reg', '11', '#f9e3ff'),
+                 zone_publiee('dep', '92', '#fcf0ff', particule='dans les'))
+        TITRE_LONG = PositiviteCtrl.TITRE_LONG
         CLAGE = 'cl_age90'
+        SCHEMA = 'sp-pos-quot'
         GIF_NOM = 'Positivite'
 
         def __init__(self, criteres):
             self.criteres = criteres
+            self.__post_init__()
 
         async def test(self) -> Path:
-            tuple_dpt = (self.DICT_CSV[self.criteres[0]])
-            image = await self.main(self.criteres[0], tuple_dpt)
-            return image
+            zone = next(zone_ for zone_ in self.ZONES if zone_.niveau == self.criteres[0])
+            rendu = await self.main(zone)
+            return rendu.chemin
 
 
     test_fr = TestCtrl(criteres=('fra', 'FR'))
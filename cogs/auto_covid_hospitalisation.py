@@ -1,88 +1,133 @@
-import asyncio, datetime, os, sys
+import asyncio, os, sys
 from dataclasses import dataclass
 
 from discord.ext import commands
-import pandas as pd
 
 from functions._local_datetime import local_dt
+from functions._jeux_donnees import registre
+from functions._planificateur import planificateur, Tache
+from functions._publications import empreinte_df, publications
+from functions._zones import REGION_PAR_DEPARTEMENT, ZonePubliee
 from model import covid_hospitalisation
+from model.cube_hospitalisation import CubeHospitalisation
 from view import views_embed as ve
-from settings import locale_value, ROLE_CS, SALON_INFO_COVID, MESSAGES_IDS_COVID, PANDAS_SPF_SPECS  # Modifier le format des milliers  # locale_value = lambda x: '{:,}'.format(x).replace(',', ' ').replace('.0', ' ')
+from settings import locale_value, ROLE_CS, SALON_INFO_COVID, MESSAGES_IDS_COVID  # Modifier le format des milliers  # locale_value = lambda x: '{:,}'.format(x).replace(',', ' ').replace('.0', ' ')
 
 
 TITRE = 'Hospitalisation'
 URL_ANSM = 'https://ansm.sante.fr/dossiers-thematiques/covid-19-vaccins/covid-19-vaccins-autorises'
 URL_DF = 'https://www.data.gouv.fr/fr/datasets/r/63352e38-d353-4b54-bfd1-f1b3ee1cabd7'
 DESCRIPTION = 'actualisé vers 20h-23h'
-MESSAGES_UTILISES = MESSAGES_IDS_COVID[1], MESSAGES_IDS_COVID[3], MESSAGES_IDS_COVID[5]
+SCHEMA_DF = ('hospitalisation', 'dep')  # Dans functions._spf_schemas.SCHEMAS
+EMPREINTE_JOURS = None  # Jours couverts par l'empreinte d'une zone. None : tout l'historique, tracé en entier.
+VERSION_GRAPHIQUE = 1  # À incrémenter si le graphique ou l'embed change, pour republier toutes les zones.
+# Un graphique et un message par zone, publiés dans cet ordre.
+ZONES = (ZonePubliee('fra', 'FR', 'France', '#F6C1BC', message_id=MESSAGES_IDS_COVID[5]),
+         ZonePubliee('reg', '11', 'IDF', '#F9D5D2', message_id=MESSAGES_IDS_COVID[3]),
+         ZonePubliee('dep', '92', 'Hauts-de-Seine', '#FBE3E1', message_id=MESSAGES_IDS_COVID[1]))
 
 
 @dataclass()
 class AutoHopital(commands.Cog):
     """Traite les DF, crée un graphique, puis l'embed."""
     bot: object
-    df = None
 
-    async def main(self) -> None:
-        """Génère les DF et les objets, puis lance le traitement des DF et des graphiques."""
+    def __post_init__(self):
+        self.cube = CubeHospitalisation(regions=REGION_PAR_DEPARTEMENT)
+        self.empreinte_cube = None  # Version du CSV appliquée au cube (functions._jeux_donnees.registre.empreinte)
+        self.verrou_cube = asyncio.Lock()
+        registre.enregistrer(URL_DF, SCHEMA_DF)
+
+    async def maj_cube(self, revalidation=0) -> None:
+        '''Actualise le CSV, puis met à jour le cube de façon incrémentale si possible, sinon le reconstruit.
+
+        Note:
+            Les actualisations simultanées sont regroupées par le registre et retournent toutes modifie=True :
+            le verrou et l'empreinte de la version appliquée garantissent qu'une ingestion n'est appliquée qu'une fois.
+        '''
+        async with self.verrou_cube:
+            await registre.actualiser(URL_DF, revalidation)
+            empreinte = registre.empreinte(URL_DF)
+            if empreinte == self.empreinte_cube:
+                return
+            ingestion = registre.fetcher.ingestion(URL_DF)
+            # L'ingestion ne s'applique qu'à la version dont elle est issue : sinon, reconstruction complète.
+            if self.cube.df is None or ingestion is None or ingestion.depuis != self.empreinte_cube:
+                async with registre.vue(URL_DF) as df:
+                    self.cube.construire(df)
+                    empreinte = registre.empreinte(URL_DF)
+            else:
+                self.cube.mettre_a_jour(ingestion)
+            self.empreinte_cube = empreinte
+
+    async def main(self, forcer=False) -> None:
+        """Génère les DF et les objets, puis lance le traitement des DF et des graphiques.
+
+        Args:
+            forcer (bool): Republier aussi les zones dont les données n'ont pas changé.
+
+        Note:
+            Une zone dont l'empreinte des données est celle de sa dernière publication n'est ni rendue,
+            ni téléversée, ni modifiée sur Discord.
+        """
         try:
-            df = self.df  # Téléchargé par la méthode <commande> ou <check_update>
-            group_drop = df[df['sexe'] == 0]
-            group_init = group_drop.groupby('dep')
-
-            # Pour le 92
-            group92 = group_init.get_group('92')
-            hosp_92 = covid_hospitalisation.Hopital(group92, 'Hauts-de-Seine', MESSAGES_UTILISES[0], '#FBE3E1')
-
-            # Pour les Hauts-de-Seine
-            group75 = group_init.get_group('75')
-            group91 = group_init.get_group('91')
-            # group92 = group_init.get_group('92')
-            group93 = group_init.get_group('93')
-            group94 = group_init.get_group('94')
-            group95 = group_init.get_group('95')
-            group77 = group_init.get_group('77')
-            group78 = group_init.get_group('78')
-            group_idf = pd.concat([group75, group91, group92, group93, group94, group95, group77, group78]).groupby(
-                ['jour'], as_index=False).sum(min_count=1)
-            hosp_idf = covid_hospitalisation.Hopital(group_idf, 'IDF', MESSAGES_UTILISES[1], '#F9D5D2')
-
-            # Pour la France
-            group_fr = group_drop.groupby(['jour']).sum(min_count=1)
-            group_fr.reset_index(level=0, inplace=True)
-            hosp_fr = covid_hospitalisation.Hopital(group_fr, 'France', MESSAGES_UTILISES[2], '#F6C1BC')
-
-            await hosp_fr(); await hosp_idf(); await hosp_92()
-            for obj in (hosp_fr, hosp_idf, hosp_92):
-                # Création du champ (field)
-                name = '\u200b'
-                result_dept = str()
-                for libelle_court, dict_y in obj.dict_coord_y_.items():
-                    # Si le libelle_court de l'attribut se trouve dans la constante.
-                    phrase = f"{dict_y['libelle_long2']} : {locale_value(dict_y['derniere_valeur'])}\n"
-                    if libelle_court in covid_hospitalisation.DICT_COORD_Y:
-                        result_dept += phrase
-                    else:
-                        result_dept += f'\n{phrase}'
-
-                # Initialisation de l'embed et modification du message
-                await ve.embed_edit_gc(bot=self.bot,
-                                       salon_id=SALON_INFO_COVID,
-                                       message_id=obj.message_id,
-                                       title=f'Hospitalisations · {obj.zone_nom}',
-                                       description=DESCRIPTION,
-                                       fields=[(name, result_dept, False)],
-                                       url=URL_ANSM,
-                                       footer=f"Données du {obj.jour}\nSanté publique France",
-                                       image_path=obj.image_path,
-                                       color_hex=obj.color_hex)
-                del obj; await asyncio.sleep(30)
-            await asyncio.sleep(60 * 60 * 6)
+            # Toutes les zones sont des tranches du cube, mis à jour par la méthode <commande> ou <check_update>.
+            zones = list()  # [(zone, df, empreinte)]
+            for zone in ZONES:
+                df = self.cube.zone(zone.niveau, zone.code)
+                empreinte = empreinte_df(df, zone, DESCRIPTION, VERSION_GRAPHIQUE, jours=EMPREINTE_JOURS)
+                if forcer or not publications.inchangee(f'{TITRE}-{zone.niveau}-{zone.code}', empreinte):
+                    zones.append((zone, df, empreinte))
+            if not zones:
+                print(f'{TITRE} : données inchangées, aucune publication.')
+                return
+
+            liste_hosp = [covid_hospitalisation.Hopital(df, zone.libelle, zone.message_id, zone.couleur)
+                          for zone, df, _ in zones]
+            # Rendus en parallèle dans le pool de processus (functions._rendu)
+            await asyncio.gather(*(hosp() for hosp in liste_hosp))
+
+            # Modifications des messages en parallèle : la file de view.views_embed respecte les limites de Discord.
+            await asyncio.gather(*(self.publier(obj, zone, empreinte)
+                                   for obj, (zone, _, empreinte) in zip(liste_hosp, zones)))
         except Exception as err:
             exc_type, exc_obj, exc_tb = sys.exc_info()
             fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
             raise Exception(err, exc_type, fname, exc_tb.tb_lineno)
 
+    async def publier(self, obj, zone, empreinte) -> None:
+        '''Modifie le message de la zone, puis enregistre l'empreinte de ses données si le graphique a été publié.'''
+        # Création du champ (field)
+        name = '\u200b'
+        result_dept = str()
+        for libelle_court, dict_y in obj.dict_coord_y_.items():
+            # Si le libelle_court de l'attribut se trouve dans la constante.
+            phrase = f"{dict_y['libelle_long2']} : {locale_value(dict_y['derniere_valeur'])}\n"
+            if libelle_court in covid_hospitalisation.DICT_COORD_Y:
+                result_dept += phrase
+            else:
+                result_dept += f'\n{phrase}'
+
+        # Initialisation de l'embed et modification du message
+        complet = await ve.embed_edit_gc(bot=self.bot,
+                                         salon_id=zone.salon_id or SALON_INFO_COVID,
+                                         message_id=obj.message_id,
+                                         title=f'Hospitalisations · {obj.zone_nom}',
+                                         description=DESCRIPTION,
+                                         fields=[(name, result_dept, False)],
+                                         url=URL_ANSM,
+                                         footer=f"Données du {obj.jour}\nSanté publique France",
+                                         image_path=obj.png,
+                                         color_hex=obj.color_hex)
+        # Embed publié sans image (échec du téléversement ou de Discord) : la zone sera republiée au prochain passage.
+        # Embed remplacé par une modification plus récente : l'empreinte est enregistrée par celle-ci.
+        if complet:
+            publications.enregistrer(f'{TITRE}-{zone.niveau}-{zone.code}', empreinte)
+        elif complet is ve.REMPLACEE:
+            print(f'{TITRE} : {zone.libelle} remplacée par une publication plus récente.')
+        else:
+            print(f'{TITRE} : {zone.libelle} publiée sans graphique.')
+
     @commands.command(brief='Hospitalisations liéées à la Covid-19', aliases=['hospitalisation', 'hospitalisations'])
     @commands.check_any(commands.has_role(ROLE_CS))
     async def hopital(self, ctx) -> None:
@@ -91,10 +136,8 @@ class AutoHopital(commands.Cog):
         Note:
             La commande utilisateur est le nom de la fonction ou ses alias.
         '''
-        df = pd.read_csv(URL_DF, infer_datetime_format=True, **PANDAS_SPF_SPECS)
-        df.sort_values(by='jour', inplace=True)
-        self.df = df
-        await self.main()
+        await self.maj_cube()
+        await self.main(forcer=True)
 
     async def check_update(self) -> None:
         """Méthode appelée par le programme en boucle.
@@ -103,12 +146,19 @@ class AutoHopital(commands.Cog):
         Note:
             La date des dernières données correspond au jour actuel.
         """
-        df = pd.read_csv(URL_DF, infer_datetime_format=True, **PANDAS_SPF_SPECS)
-        df.sort_values(by='jour', inplace=True)
+        dt_local_time = await local_dt()
+        date_attendue = dt_local_time.date()
+
+        # Sonde : seule la fin du CSV est lue. None si le serveur ne le permet pas.
+        date_sonde = await registre.fetcher.dernier_jour(URL_DF)
+        if date_sonde not in {None, date_attendue}:
+            raise ValueError(f'{TITRE} : La date demandée est indisponible.\n {date_attendue = }; {date_sonde = }')
+
+        # Requête conditionnelle : le CSV n'est téléchargé et parsé que s'il a changé.
+        await self.maj_cube()
 
         # On détermine si le jour des données du CSV (=la veille) correspond au jour recherché (=la veille).
-        date_attendue = dt_local_time.date()
-        date_obtenue =  datetime.datetime.strptime(str(df['jour'].iat[-1]), '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d')  # Jour issu du CSV
+        date_obtenue = str(self.cube.df.index.get_level_values('jour').max().date())  # Jour issu du CSV
 
         # Si ces deux jours ne correspondent pas, attendre 30 min puis relancer la requête.
         if str(date_attendue) != str(date_obtenue):
@@ -116,34 +166,18 @@ class AutoHopital(commands.Cog):
 
         # Si ces deux jours correspondent, la requête peut être lancée, et puis interrompue jusqu'à demain.
         else:
-            self.df = df
             await self.main()
 
     @commands.Cog.listener()
     async def on_ready(self) -> None:
-        """Lance automatiquement le programme en boucle.
-
-        Raises:
-            Exception générale.
-        """
-        running = True
-        while running:
-            try:
-                global dt_local_time
-                dt_local_time = await local_dt()
-                if 18 <= dt_local_time.hour <= 23 and dt_local_time.minute in {10, 40}:
-                    await self.check_update()
-            except Exception as err:
-                exc_type, exc_obj, exc_tb = sys.exc_info()
-                fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
-                print(TITRE, err, exc_type, fname, exc_tb.tb_lineno)
-            finally:
-                await asyncio.sleep(55)
-
-
-def setup(bot):
-    bot.add_cog(AutoHopital(bot))
-
-
-if __name__ == '__main__':
-    pass
+        """Planifie la vérification des données, puis la publication (voir functions._planificateur)."""
+        planificateur.ajouter(Tache(f'{TITRE}-check_update', self.check_update,
+                                    heures=range(18, 24), minutes={10, 40}, jitter=20,
+                                    delai_max=60 * 30, une_fois_par_jour=True))
+        planificateur.demarrer()
+        # Messages à modifier, résolus une fois par connexion (view.views_embed.CacheMessages)
+        try:
+            await ve.cache_messages.resoudre(self.bot, [(zone.salon_id or SALON_INFO_COVID, zone.message_id)
+                                                        for zone in ZONES])
+        except Exception as err:
+            print(TITRE, err)
@@ -0,0 +1,98 @@
+"""Cache des images rendues, indexé par modèle, zone et empreinte des données de la zone.
+
+Tant que ces données n'ont pas changé, une même demande (par ex. `!vaccin 75`) retourne l'image déjà rendue.
+Les entrées récentes sont gardées en mémoire (LRU), toutes sont écrites sur disque dans la limite d'un budget.
+"""
+
+
+import hashlib, json, os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+CACHE_DIR = Path('./data/cache/rendus')
+
+
+def cle_rendu(*elements) -> str:
+    """Clé à partir de n'importe quels éléments ayant une représentation stable, par ex. (modèle, zone, empreinte)."""
+    return hashlib.sha1('|'.join(map(repr, elements)).encode()).hexdigest()
+
+
+@dataclass
+class Rendu:
+    png:    bytes
+    jour:   str  # Date de la dernière donnée, pour le pied de l'embed
+    chemin: Path
+
+
+@dataclass
+class CacheRendu:
+    dossier:       Path = CACHE_DIR
+    nb_memoire:    int = 64  # Entrées gardées en mémoire
+    budget_octets: int = 256 * 1024 ** 2  # 256 Mo sur disque
+    memoire:       OrderedDict = field(default_factory=OrderedDict)
+    succes:        int = 0
+    echecs:        int = 0
+
+    __slots__ = '__dict__',
+
+    def lire(self, cle) -> Rendu:
+        """Retourne le rendu en cache, ou None."""
+        if cle in self.memoire:
+            self.memoire.move_to_end(cle)
+            self.succes += 1
+            return self.memoire[cle]
+
+        chemin = Path(self.dossier) / f'{cle}.png'
+        try:
+            with open(chemin.with_suffix('.json'), encoding='utf-8') as f:
+                jour = json.load(f)['jour']
+            with open(chemin, 'rb') as f:
+                rendu = Rendu(png=f.read(), jour=jour, chemin=chemin)
+        except (FileNotFoundError, ValueError, KeyError):
+            self.echecs += 1
+            return None
+        os.utime(chemin)
+        self.succes += 1
+        self._memoriser(cle, rendu)
+        return rendu
+
+    def ecrire(self, cle, png, jour) -> Rendu:
+        os.makedirs(self.dossier, exist_ok=True)
+        chemin = Path(self.dossier) / f'{cle}.png'
+        with open(chemin, 'wb') as f:
+            f.write(png)
+        with open(chemin.with_suffix('.json'), 'w', encoding='utf-8') as f:
+            json.dump({'jour': jour}, f)
+        rendu = Rendu(png=png, jour=jour, chemin=chemin)
+        self._memoriser(cle, rendu)
+        self.evincer()
+        return rendu
+
+    def _memoriser(self, cle, rendu) -> None:
+        self.memoire[cle] = rendu
+        self.memoire.move_to_end(cle)
+        while len(self.memoire) > self.nb_memoire:
+            self.memoire.popitem(last=False)
+
+    def evincer(self) -> None:
+        """Supprime du disque les images les moins récemment utilisées au-delà du budget."""
+        fichiers = [(f.stat().st_mtime, f.stat().st_size, f) for f in Path(self.dossier).glob('*.png')]
+        total = 0
+        for mtime, taille, fichier in sorted(fichiers, reverse=True):  # Du plus récent au plus ancien
+            if total + taille > self.budget_octets:
+                fichier.unlink(missing_ok=True)
+                fichier.with_suffix('.json').unlink(missing_ok=True)
+                self.memoire.pop(fichier.stem, None)
+            else:
+                total += taille
+
+    @property
+    def taux_succes(self) -> float:
+        total = self.succes + self.echecs
+        return self.succes / total if total else 0.
+
+
+# Instance partagée par les cogs
+cache_rendu = CacheRendu()
@@ -0,0 +1,70 @@
+"""Cache des images téléversées, indexé par l'empreinte SHA-256 de leur contenu.
+
+Une image identique octet pour octet à une image déjà téléversée (données inchangées ou révisées aux mêmes valeurs)
+réutilise son URL, sans nouveau téléversement. Les URL expirent après TTL et sont conservées sur disque.
+"""
+
+
+import hashlib, json, os, threading, time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+FICHIER = Path('./data/cache/uploads.json')
+TTL = 60 * 60 * 24 * 30  # 30 jours
+
+
+empreinte = lambda contenu: hashlib.sha256(contenu).hexdigest()
+
+
+@dataclass
+class CacheUpload:
+    fichier: Path = FICHIER
+    ttl:     int = TTL
+    entrees: dict = None  # {empreinte: (url, expire_le)}, lu sur disque au premier accès
+    succes:  int = 0
+    echecs:  int = 0
+    verrou:  object = field(default_factory=threading.Lock)  # Les téléversements s'exécutent dans des threads.
+
+    __slots__ = '__dict__',
+
+    def charger(self) -> dict:
+        if self.entrees is None:
+            try:
+                with open(self.fichier, encoding='utf-8') as f:
+                    self.entrees = {cle: tuple(valeur) for cle, valeur in json.load(f).items()}
+            except (FileNotFoundError, ValueError):
+                self.entrees = dict()
+        return self.entrees
+
+    def lire(self, cle) -> str:
+        """URL de l'image d'empreinte cle, ou None si absente ou expirée."""
+        with self.verrou:
+            url, expire_le = self.charger().get(cle, (None, 0))
+            if expire_le < time.time():
+                self.echecs += 1
+                return None
+            self.succes += 1
+            return url
+
+    def ecrire(self, cle, url) -> None:
+        with self.verrou:
+            maintenant = time.time()
+            entrees = self.charger()
+            entrees[cle] = (url, maintenant + self.ttl)
+            for cle_ in [cle_ for cle_, (_, expire_le) in entrees.items() if expire_le < maintenant]:
+                del entrees[cle_]
+            os.makedirs(Path(self.fichier).parent, exist_ok=True)
+            temporaire = Path(self.fichier).with_suffix('.tmp')
+            with open(temporaire, 'w', encoding='utf-8') as f:
+                json.dump(entrees, f)
+            os.replace(temporaire, self.fichier)
+
+    @property
+    def taux_succes(self) -> float:
+        total = self.succes + self.echecs
+        return self.succes / total if total else 0.
+
+
+# Instance partagée par view.views_embed
+cache_upload = CacheUpload()
@@ -0,0 +1,70 @@
+"""Encodeur Gif des rotations géographiques, en une seule passe.
+
+Les images sont ajoutées au fur et à mesure de leur rendu, et conservées compressées (octets PNG) avec une vignette.
+À la fin, une palette commune est calculée sur une mosaïque des vignettes, puis chaque image est décodée,
+quantifiée (8 bits par pixel) et écrite une seule fois : le coût est linéaire en nombre d'images.
+
+Note:
+    Ce n'est pas un encodage en flux : Pillow garde les images quantifiées jusqu'à la fin de l'écriture,
+    mais aucune image RGB complète n'est conservée entre deux ajouts.
+"""
+
+
+import io
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from PIL import Image
+
+
+TAILLE_VIGNETTE = (256, 256)
+
+
+@dataclass
+class GifRotation:
+    duree:     float  # Durée d'affichage de chaque image, en secondes
+    images:    list = field(default_factory=list)  # Octets PNG, décodés seulement à l'écriture
+    vignettes: list = field(default_factory=list)
+
+    __slots__ = '__dict__',
+
+    def ajouter(self, image) -> None:
+        """Ajoute une image.
+
+        Args:
+            image (bytes | Path | str): Octets PNG ou chemin d'une image.
+        """
+        contenu = bytes(image) if isinstance(image, (bytes, bytearray)) else Path(image).read_bytes()
+        with Image.open(io.BytesIO(contenu)) as img:
+            vignette = img.convert('RGB')
+        vignette.thumbnail(TAILLE_VIGNETTE)
+        self.images.append(contenu)
+        self.vignettes.append(vignette)
+
+    def palette(self) -> Image.Image:
+        """Palette de 256 couleurs commune à toutes les images."""
+        largeur = sum(vignette.width for vignette in self.vignettes)
+        hauteur = max(vignette.height for vignette in self.vignettes)
+        mosaique = Image.new('RGB', (largeur, hauteur), 'white')
+        x = 0
+        for vignette in self.vignettes:
+            mosaique.paste(vignette, (x, 0))
+            x += vignette.width
+        return mosaique.quantize(colors=256, method=Image.Quantize.MEDIANCUT)
+
+    def quantifier(self, palette):
+        '''Images une à une, décodées puis réduites à la palette commune.'''
+        for contenu in self.images:
+            with Image.open(io.BytesIO(contenu)) as img:
+                yield img.convert('RGB').quantize(palette=palette, dither=Image.Dither.NONE)
+
+    def enregistrer(self, destination) -> Path:
+        """Écrit le Gif en une seule passe.
+
+        Args:
+            destination (Path | str | io.BytesIO)
+        """
+        images = self.quantifier(self.palette())
+        next(images).save(destination, format='GIF', save_all=True, append_images=images,
+                          duration=int(self.duree * 1000), loop=0)
+        return destination
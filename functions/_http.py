@@ -0,0 +1,118 @@
+"""Téléchargement asynchrone en flux, sans bloquer la boucle d'événements de discord.py.
+
+Une seule session aiohttp est partagée : les connexions vers data.gouv.fr et static.data.gouv.fr sont réutilisées.
+Le corps de la réponse (décompressé à la volée si le serveur l'envoie en gzip) est écrit par blocs dans un fichier
+temporaire, et son empreinte SHA-256 est calculée pendant l'écriture.
+"""
+
+
+import asyncio, hashlib, os, tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+import aiohttp
+
+from functions._timer import mesure
+
+
+TAILLE_BLOC = 1024 ** 2  # 1 Mo
+TMP_DIR = Path('./data/cache/tmp')
+
+
+@dataclass
+class Reponse:
+    statut:        int
+    chemin:        Path = None  # Fichier temporaire du corps, à supprimer par l'appelant (voir supprimer())
+    sha256:        str = None
+    etag:          str = None
+    last_modified: str = None
+
+    def supprimer(self) -> None:
+        if self.chemin is not None:
+            Path(self.chemin).unlink(missing_ok=True)
+
+
+@dataclass
+class Telechargeur:
+    '''Client HTTP partagé.
+
+    Note:
+        Aucune URL n'est figée : pointer les URLs vers un serveur local suffit à tester le téléchargement hors ligne.
+    '''
+    timeout_total:     int = 120  # Secondes, pour toute la requête
+    timeout_connexion: int = 15
+    timeout_lecture:   int = 60  # Secondes sans recevoir d'octet
+    nb_connexions:     int = 8
+    dossier:           Path = TMP_DIR
+    session:           object = None  # aiohttp.ClientSession, créée au premier appel
+
+    __slots__ = '__dict__',
+
+    def ouvrir(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout_total, sock_connect=self.timeout_connexion,
+                                              sock_read=self.timeout_lecture),
+                connector=aiohttp.TCPConnector(limit=self.nb_connexions, ttl_dns_cache=300),
+                headers={'Accept-Encoding': 'gzip, deflate'})
+        return self.session
+
+    async def fermer(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def telecharger(self, url, headers=None) -> Reponse:
+        """GET en flux vers un fichier temporaire.
+
+        Args:
+            headers (dict): En-têtes supplémentaires, par ex. If-None-Match.
+
+        Returns:
+            reponse (Reponse): Sans chemin si le serveur répond 304 (Not Modified).
+
+        Raises:
+            aiohttp.ClientResponseError: Statut d'erreur.
+            asyncio.TimeoutError
+        """
+        with mesure('telechargement'):
+            return await self._telecharger(url, headers)
+
+    async def _telecharger(self, url, headers) -> Reponse:
+        async with self.ouvrir().get(url, headers=headers) as response:
+            reponse = Reponse(statut=response.status, etag=response.headers.get('ETag'),
+                              last_modified=response.headers.get('Last-Modified'))
+            if response.status == 304:
+                return reponse
+            response.raise_for_status()
+
+            os.makedirs(self.dossier, exist_ok=True)
+            descripteur, chemin = tempfile.mkstemp(suffix='.csv', dir=self.dossier)
+            reponse.chemin = Path(chemin)
+            sha256 = hashlib.sha256()
+            try:
+                with open(descripteur, 'wb') as f:
+                    async for bloc in response.content.iter_chunked(TAILLE_BLOC):
+                        sha256.update(bloc)
+                        await asyncio.to_thread(f.write, bloc)
+            except BaseException:
+                reponse.supprimer()
+                raise
+            reponse.sha256 = sha256.hexdigest()
+            return reponse
+
+    async def extrait(self, url, plage) -> bytes:
+        """GET partiel (en-tête Range), par ex. plage='bytes=-16384' pour les 16 derniers Ko.
+
+        Returns:
+            contenu (bytes): None si le serveur ne gère pas les requêtes partielles.
+        """
+        with mesure('sonde'):
+            async with self.ouvrir().get(url, headers={'Range': plage, 'Accept-Encoding': 'identity'}) as response:
+                if response.status != 206:  # Un 200 annonce le fichier complet : il n'est pas lu.
+                    return None
+                return await response.read()
+
+
+# Instance partagée par functions._spf_download
+telechargeur = Telechargeur()
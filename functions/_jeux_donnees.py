@@ -0,0 +1,121 @@
+"""Registre des jeux de données partagé par tous les cogs.
+
+Chaque URL n'est téléchargée et parsée qu'une fois par mise à jour, quel que soit le nombre de cogs qui la lisent :
+les actualisations simultanées d'une même URL sont regroupées (functions._single_flight), et le DF obtenu est
+conservé en un seul exemplaire par version (empreinte SHA-256 du CSV).
+
+Les cogs lisent les DF par des vues à compteur de références. Une ancienne version reste en mémoire tant qu'une vue
+l'utilise, puis est libérée.
+"""
+
+
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+from functions._single_flight import SingleFlight
+from functions._spf_download import SpfFetcher, spf_fetcher
+
+
+REVALIDATION = 60 * 10  # Délai en secondes pendant lequel une version est servie sans requête
+
+
+@dataclass
+class Version:
+    empreinte: str
+    df:        object
+    refs:      int = 0  # Vues ouvertes
+    derives:   dict = field(default_factory=dict)  # {nom: objet calculé à partir du DF}, voir RegistreDonnees.derive()
+
+
+@dataclass
+class RegistreDonnees:
+    fetcher:      SpfFetcher = field(default_factory=lambda: spf_fetcher)
+    revalidation: int = REVALIDATION
+    schemas:      dict = field(default_factory=dict)  # {url: (nom, zone)} dans functions._spf_schemas.SCHEMAS
+    versions:     dict = field(default_factory=dict)  # {url: {empreinte: Version}}
+    courantes:    dict = field(default_factory=dict)  # {url: empreinte}
+    abonnes:      dict = field(default_factory=dict)  # {url: {clé: fonction(url)}}, appelées à chaque nouvelle version
+    vols:         SingleFlight = field(default_factory=SingleFlight)  # Actualisations en cours, hors rendus
+
+    __slots__ = '__dict__',
+
+    def enregistrer(self, url, schema) -> None:
+        self.schemas[url] = schema
+
+    def abonner(self, url, cle, fonction) -> None:
+        '''fonction(url) sera appelée à chaque nouvelle version téléchargée. Un nouvel abonnement de même clé remplace le précédent.'''
+        self.abonnes.setdefault(url, dict())[cle] = fonction
+
+    async def actualiser(self, url, revalidation=None) -> bool:
+        """Vérifie l'URL (requête conditionnelle), et ajoute la nouvelle version si le CSV a changé.
+
+        Args:
+            revalidation (int): En secondes, par défaut celle du registre. 0 force la requête.
+
+        Returns:
+            modifie (bool)
+        """
+        revalidation = self.revalidation if revalidation is None else revalidation
+        # Version assez récente pour l'appelant : servie sans rejoindre une actualisation en cours.
+        if url in self.courantes and self.fetcher.frais(url, revalidation):
+            self.fetcher.compteurs['memoire'] += 1
+            return False
+        # Sinon, une seule actualisation par URL, quelle que soit la revalidation demandée par chaque appelant.
+        return await self.vols(url, lambda: self._actualiser(url, revalidation))
+
+    async def _actualiser(self, url, revalidation) -> bool:
+        modifie, df = await self.fetcher(url, revalidation, schema=self.schemas.get(url))
+        empreinte = self.fetcher.empreinte(url)
+        versions = self.versions.setdefault(url, dict())
+        if empreinte not in versions:
+            versions[empreinte] = Version(empreinte, df)
+        self.courantes[url] = empreinte
+        self.purger(url)
+        if modifie:
+            for fonction in self.abonnes.get(url, dict()).values():
+                fonction(url)
+        return modifie
+
+    @asynccontextmanager
+    async def vue(self, url, revalidation=None):
+        """Vue en lecture seule de la version courante, actualisée si elle est plus ancienne que revalidation.
+
+        Note:
+            La vue est une copie superficielle : ajouter ou remplacer des colonnes ne touche pas l'exemplaire partagé,
+            mais ses valeurs ne doivent pas être modifiées en place. Les tranches (iloc, loc, filtres) sont des copies
+            et peuvent être conservées après la fermeture de la vue.
+        """
+        await self.actualiser(url, revalidation)
+        version = self.versions[url][self.courantes[url]]
+        version.refs += 1
+        try:
+            yield version.df.copy(deep=False)
+        finally:
+            version.refs -= 1
+            self.purger(url)
+
+    def derive(self, url, nom, fabrique):
+        """Objet calculé une seule fois par version à partir du DF courant, par ex. un index par zone.
+
+        Args:
+            fabrique : Fonction recevant le DF.
+        """
+        version = self.versions[url][self.courantes[url]]
+        if nom not in version.derives:
+            version.derives[nom] = fabrique(version.df)
+        return version.derives[nom]
+
+    def purger(self, url) -> None:
+        '''Libère les anciennes versions sans vue ouverte.'''
+        versions = self.versions.get(url, dict())
+        for empreinte in [empreinte for empreinte, version in versions.items()
+                          if empreinte != self.courantes.get(url) and version.refs == 0]:
+            del versions[empreinte]
+
+    def empreinte(self, url) -> str:
+        '''Empreinte de la version courante, ou None.'''
+        return self.courantes.get(url)
+
+
+# Instance partagée par les cogs
+registre = RegistreDonnees()
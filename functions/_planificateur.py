@@ -0,0 +1,148 @@
+"""Planificateur central des tâches des cogs.
+
+Deux déclencheurs :
+    - horaire, à la manière de cron (heures et minutes autorisées), calculé à l'avance : un créneau n'est jamais
+      manqué, même si la boucle d'événements a pris du retard ;
+    - changement d'un jeu de données de functions._jeux_donnees.
+
+Chaque exécution est une tâche asyncio annulable, limitée par un délai maximal : une publication lente ne bloque
+ni les autres tâches ni les vérifications.
+"""
+
+
+import asyncio, datetime, os, random, sys
+from dataclasses import dataclass, field
+from zoneinfo import ZoneInfo
+
+from functions._jeux_donnees import registre
+from functions._timer import mesure, mesures
+
+
+FUSEAU = ZoneInfo('Europe/Paris')
+ATTENTE_MAX = 60  # Secondes entre deux passages de la boucle, au plus
+MINUTES_EXPORT = range(0, 60, 15)  # Export des mesures de functions._timer
+
+
+maintenant = lambda: datetime.datetime.now(FUSEAU)
+
+
+async def exporter_mesures() -> None:
+    mesures.exporter_prometheus()
+    mesures.exporter_json()
+
+
+@dataclass
+class Tache:
+    nom:               str
+    fonction:          object  # Fonction sans argument retournant une coroutine
+    heures:            object = None  # Heures autorisées (range, set), None pour toutes
+    minutes:           object = None  # Minutes autorisées, None : aucun déclenchement horaire
+    urls:              tuple = ()  # Déclenchement à chaque nouvelle version de ces jeux de données
+    jitter:            float = 0.  # Retard aléatoire maximal, en secondes
+    delai_max:         float = None  # En secondes, au-delà l'exécution est annulée
+    une_fois_par_jour: bool = False  # Plus de déclenchement horaire le jour d'une exécution réussie
+    remplacer:         bool = False  # Un nouveau déclenchement annule l'exécution en cours au lieu d'être ignoré
+    prochaine:         datetime.datetime = None  # Prochain créneau horaire
+    reussie_le:        datetime.date = None
+    execution:         asyncio.Task = None
+
+    __slots__ = '__dict__',
+
+    def creneau_suivant(self, apres) -> datetime.datetime:
+        """Premier créneau horaire strictement postérieur à apres (à la minute), ou None."""
+        if self.minutes is None:
+            return None
+        creneau = apres.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        for _ in range(60 * 24 * 2):
+            if creneau.minute in self.minutes and (self.heures is None or creneau.hour in self.heures):
+                return creneau
+            creneau += datetime.timedelta(minutes=1)
+        return None
+
+    @property
+    def en_cours(self) -> bool:
+        return self.execution is not None and not self.execution.done()
+
+
+@dataclass
+class Planificateur:
+    taches: dict = field(default_factory=dict)  # {nom: Tache}
+    boucle: asyncio.Task = None
+    reveil: asyncio.Event = None
+
+    __slots__ = '__dict__',
+
+    def ajouter(self, tache) -> Tache:
+        """Ajoute une tâche, ou remplace celle de même nom (par ex. lors d'un nouvel on_ready)."""
+        if ancienne := self.taches.get(tache.nom):  # L'exécution en cours et la dernière réussite sont conservées.
+            tache.execution, tache.reussie_le = ancienne.execution, ancienne.reussie_le
+        self.taches[tache.nom] = tache
+        tache.prochaine = tache.creneau_suivant(maintenant())
+        for url in tache.urls:
+            registre.abonner(url, tache.nom, lambda url_, nom=tache.nom: self.declencher(nom))
+        if self.reveil is not None:
+            self.reveil.set()
+        return tache
+
+    def demarrer(self) -> None:
+        self.ajouter(Tache('export_mesures', exporter_mesures, minutes=MINUTES_EXPORT))
+        if self.boucle is None or self.boucle.done():
+            self.reveil = asyncio.Event()
+            self.boucle = asyncio.create_task(self.tourner())
+
+    def arreter(self) -> None:
+        for tache in self.taches.values():
+            if tache.en_cours:
+                tache.execution.cancel()
+        if self.boucle is not None:
+            self.boucle.cancel()
+
+    async def tourner(self) -> None:
+        while True:
+            instant = maintenant()
+            for tache in self.taches.values():
+                if tache.prochaine is not None and tache.prochaine <= instant:
+                    tache.prochaine = tache.creneau_suivant(instant)
+                    if tache.reussie_le != instant.date() or not tache.une_fois_par_jour:
+                        self.lancer(tache)
+
+            prochaines = [tache.prochaine for tache in self.taches.values() if tache.prochaine is not None]
+            attente = min([(prochaine - maintenant()).total_seconds() for prochaine in prochaines] + [ATTENTE_MAX])
+            self.reveil.clear()
+            try:
+                await asyncio.wait_for(self.reveil.wait(), max(attente, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    def declencher(self, nom) -> None:
+        '''Lance une tâche immédiatement, par ex. sur changement d'un jeu de données.'''
+        if tache := self.taches.get(nom):
+            self.lancer(tache)
+
+    def lancer(self, tache) -> None:
+        if tache.en_cours:
+            if not tache.remplacer:
+                print(tache.nom, ': exécution précédente en cours, déclenchement ignoré.')
+                return
+            tache.execution.cancel()
+        tache.execution = asyncio.create_task(self.executer(tache), name=tache.nom)
+
+    async def executer(self, tache) -> None:
+        try:
+            if tache.jitter:
+                await asyncio.sleep(random.uniform(0, tache.jitter))
+            with mesure(tache.nom):
+                await asyncio.wait_for(tache.fonction(), tache.delai_max)
+            tache.reussie_le = maintenant().date()
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            print(tache.nom, f': délai maximal de {tache.delai_max} s dépassé.')
+        except Exception as err:
+            exc_type, exc_obj, exc_tb = sys.exc_info()
+            fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
+            print(tache.nom, err, exc_type, fname, exc_tb.tb_lineno)
+
+
+# Instance partagée par les cogs
+planificateur = Planificateur()
@@ -0,0 +1,65 @@
+"""Empreintes des données publiées, pour ne pas republier une zone dont les données n'ont pas changé.
+
+L'empreinte d'une zone couvre sa tranche du DF et les métadonnées qui changent l'image ou l'embed
+(libellé, couleur, message...). Elle est conservée sur disque après chaque publication réussie.
+"""
+
+
+import hashlib, json, os
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+
+FICHIER = Path('./data/cache/publications.json')
+
+
+def empreinte_df(df, *metadonnees, jours=None) -> str:
+    """SHA-256 des lignes du DF et des métadonnées.
+
+    Args:
+        df (pandas.DataFrame): Tranche d'une zone, avec une colonne ou un index 'jour'.
+        metadonnees : Éléments ayant une représentation stable.
+        jours (int): Ne prendre que les N derniers jours. None pour toutes les lignes.
+    """
+    index = 'jour' not in df.columns  # Les jours font alors partie des données.
+    if jours is not None:
+        jour = df.index.get_level_values('jour') if index else df['jour']
+        df = df[jour > jour.max() - pd.Timedelta(days=jours)]
+    sha256 = hashlib.sha256(pd.util.hash_pandas_object(df, index=index).values.tobytes())
+    sha256.update('|'.join(map(repr, (list(df.columns), *metadonnees))).encode())
+    return sha256.hexdigest()
+
+
+@dataclass
+class Publications:
+    fichier:   Path = FICHIER
+    empreintes: dict = None  # {clé de publication: empreinte}, lu sur disque au premier accès
+
+    __slots__ = '__dict__',
+
+    def charger(self) -> dict:
+        if self.empreintes is None:
+            try:
+                with open(self.fichier, encoding='utf-8') as f:
+                    self.empreintes = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self.empreintes = dict()
+        return self.empreintes
+
+    def inchangee(self, cle, empreinte) -> bool:
+        return self.charger().get(cle) == empreinte
+
+    def enregistrer(self, cle, empreinte) -> None:
+        '''À appeler une fois la publication réussie.'''
+        self.charger()[cle] = empreinte
+        os.makedirs(Path(self.fichier).parent, exist_ok=True)
+        temporaire = Path(self.fichier).with_suffix('.tmp')
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            json.dump(self.empreintes, f)
+        os.replace(temporaire, self.fichier)
+
+
+# Instance partagée par les cogs
+publications = Publications()
@@ -0,0 +1,160 @@
+"""Exécution du rendu matplotlib dans un pool de processus.
+
+pandas et matplotlib bloquent la boucle d'événements de discord.py : le rendu est donc délégué à des processus,
+qui reçoivent une tranche compacte du DF et la spécification du graphique, et retournent les octets de l'image.
+
+Les figures sont créées sans pyplot (Figure et FigureCanvasAgg explicites) : aucun état global n'est partagé,
+et le rendu peut aussi bien tourner dans plusieurs threads à la fois.
+"""
+
+
+import asyncio, contextvars, io, locale, multiprocessing, os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from functions._timer import chemin_courant, mesure, mesures
+
+try:
+    import resource  # Absent sous Windows
+except ImportError:
+    resource = None
+
+
+NB_PROCESSUS = max(1, (os.cpu_count() or 2) - 1)  # Un cœur reste libre pour la boucle d'événements.
+MODE = 'processus'  # ou 'threads'
+NB_PROCESSUS_BASSE_PRIORITE = max(1, NB_PROCESSUS // 2)  # Pool dédié aux pré-rendus
+
+# Dans un contexte où cette variable vaut True, par ex. une tâche de pré-rendu, le pool basse priorité est utilisé.
+basse_priorite = contextvars.ContextVar('basse_priorite', default=False)
+
+_executors = dict()  # {basse priorité (bool): pool}
+file = Counter()  # {'en_cours': rendus soumis et non terminés, 'total': rendus soumis}
+memoires = dict()  # {pid: (mémoire résidente, pic) en octets}, transmis par chaque processus de rendu avec ses mesures
+
+
+def _initialiser(nice=0, locale_=None) -> None:
+    '''Exécuté au démarrage de chaque processus de rendu, avec la locale du processus parent.'''
+    import matplotlib
+    matplotlib.use('Agg')
+    if locale_:  # Un processus 'spawn' n'hérite pas de locale.setlocale().
+        locale.setlocale(locale.LC_ALL, locale_)
+    if nice and hasattr(os, 'nice'):  # Absent sous Windows
+        os.nice(nice)
+
+
+def executor(basse_priorite_=False) -> ProcessPoolExecutor:
+    """Pool partagé, créé au premier rendu.
+
+    Note:
+        'spawn' évite de dupliquer par fork les threads de discord.py.
+        Les processus du pool basse priorité cèdent le processeur aux rendus demandés par les utilisateurs.
+    """
+    if basse_priorite_ not in _executors:
+        nb = NB_PROCESSUS_BASSE_PRIORITE if basse_priorite_ else NB_PROCESSUS
+        if MODE == 'threads':
+            _executors[basse_priorite_] = ThreadPoolExecutor(max_workers=nb, thread_name_prefix='rendu')
+        else:
+            _executors[basse_priorite_] = ProcessPoolExecutor(max_workers=nb,
+                                                              mp_context=multiprocessing.get_context('spawn'),
+                                                              initializer=_initialiser,
+                                                              initargs=(10 if basse_priorite_ else 0,
+                                                                        locale.setlocale(locale.LC_ALL)))
+    return _executors[basse_priorite_]
+
+
+async def rendre(fonction, *args):
+    """Exécute fonction(*args) dans le pool, sans bloquer la boucle d'événements.
+
+    Args:
+        fonction : Fonction ou méthode sérialisable (pickle), tout comme ses arguments.
+    """
+    loop = asyncio.get_running_loop()
+    executor_ = executor(basse_priorite.get())
+    file['total'] += 1
+    file['en_cours'] += 1
+    try:
+        if MODE == 'threads':  # Les mesures sont enregistrées directement, sous l'étape de l'appelant.
+            return await loop.run_in_executor(executor_, contextvars.copy_context().run, _mesurer, fonction, *args)
+        chemin = chemin_courant()
+        resultat, journal, (pid, *memoire) = await loop.run_in_executor(executor_, _executer, fonction, *args)
+    finally:
+        file['en_cours'] -= 1
+
+    memoires[pid] = tuple(memoire)
+    for etapes, duree in journal:  # Mesures du processus de rendu, rattachées à l'étape de l'appelant
+        mesures.enregistrer((*chemin, *etapes), duree)
+    return resultat
+
+
+def _mesurer(fonction, *args):
+    with mesure('rendu'):
+        return fonction(*args)
+
+
+def _executer(fonction, *args) -> tuple:
+    '''Exécuté dans un processus de rendu : retourne le résultat, les mesures des étapes et la mémoire.'''
+    mesures.vider()
+    resultat = _mesurer(fonction, *args)
+    return resultat, mesures.vider(), (os.getpid(), memoire_residente(), pic_memoire())
+
+
+def arreter() -> None:
+    for executor_ in _executors.values():
+        executor_.shutdown(cancel_futures=True)
+    _executors.clear()
+    memoires.clear()
+
+
+@contextmanager
+def figure(**kwargs) -> Figure:
+    """Figure indépendante de pyplot, vidée en sortie de bloc.
+
+    Args:
+        kwargs : Arguments de matplotlib.figure.Figure, par ex. figsize.
+    """
+    fig = Figure(**kwargs)
+    FigureCanvasAgg(fig)
+    try:
+        yield fig
+    finally:
+        fig.clear()  # Libère les artistes sans attendre le ramasse-miettes.
+
+
+def png(fig, **kwargs) -> bytes:
+    """Octets PNG de la figure."""
+    buffer = io.BytesIO()
+    with mesure('encodage'):
+        fig.savefig(buffer, format='png', **kwargs)
+    return buffer.getvalue()
+
+
+def memoire_residente() -> int:
+    """Mémoire résidente (RSS) actuelle du processus courant, en octets. None si indisponible (hors Linux)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):  # os.sysconf() est absent sous Windows.
+        return None
+
+
+def pic_memoire() -> int:
+    """Pic de mémoire résidente (RSS) du processus courant depuis son démarrage, en octets. None si indisponible."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # ru_maxrss en Ko sous Linux
+
+
+def memoire_processus() -> list:
+    """Mémoire résidente et pic de chaque processus de rendu, relevés à la fin de son dernier rendu.
+
+    Returns:
+        memoires (list): [(mémoire résidente, pic)], en octets.
+
+    Note:
+        Aucune tâche n'est soumise aux pools : un processus n'apparaît qu'après son premier rendu.
+    """
+    return [memoires[pid] for pid in sorted(memoires)]
@@ -0,0 +1,48 @@
+"""Regroupement des demandes identiques simultanées (single-flight).
+
+Si plusieurs utilisateurs demandent le même graphique au même moment, un seul calcul est lancé,
+et tous les appelants reçoivent son résultat.
+"""
+
+
+import asyncio
+from dataclasses import dataclass, field
+
+
+@dataclass
+class SingleFlight:
+    en_vol:  dict = field(default_factory=dict)  # {clé: asyncio.Task}
+    appels:  int = 0
+    calculs: int = 0
+
+    __slots__ = '__dict__',
+
+    async def __call__(self, cle, fabrique):
+        """Retourne le résultat de fabrique(), partagé avec les appels simultanés de même clé.
+
+        Args:
+            cle : Clé hashable, par ex. (commande, zone).
+            fabrique : Fonction sans argument retournant une coroutine.
+        """
+        self.appels += 1
+        tache = self.en_vol.get(cle)
+        if tache is None:
+            self.calculs += 1
+            tache = asyncio.ensure_future(fabrique())
+            self.en_vol[cle] = tache
+            tache.add_done_callback(lambda _: self.en_vol.pop(cle, None))
+        # shield() : l'annulation d'un appelant n'interrompt pas le calcul des autres.
+        return await asyncio.shield(tache)
+
+    @property
+    def taux_regroupement(self) -> float:
+        '''Part des appels servis par un calcul déjà en cours.'''
+        return 1 - self.calculs / self.appels if self.appels else 0.
+
+    @property
+    def en_cours(self) -> int:
+        return len(self.en_vol)
+
+
+# Instance partagée par les cogs
+single_flight = SingleFlight()
@@ -0,0 +1,97 @@
+"""Cache disque des DF de Santé publique France, au format colonnes typées (Parquet).
+
+Chaque DF est indexé par l'URL et l'empreinte SHA-256 du CSV d'origine.
+Les fichiers sont évincés selon leur âge puis selon un budget disque total.
+"""
+
+
+import datetime, hashlib, json, os, time
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  # Requis par pandas pour Parquet
+    EXTENSION = 'parquet'
+except ImportError:  # Repli sans dépendance optionnelle
+    EXTENSION = 'pkl'
+
+
+CACHE_DIR = Path('./data/cache/spf')
+
+
+def cle_url(url) -> str:
+    '''Nom de fichier court et stable pour une URL.'''
+    return hashlib.sha1(url.encode()).hexdigest()[:16]
+
+
+@dataclass
+class SpfCache:
+    dossier:       Path = CACHE_DIR
+    age_max:       datetime.timedelta = datetime.timedelta(days=7)
+    budget_octets: int = 512 * 1024 ** 2  # 512 Mo
+
+    __slots__ = '__dict__',
+
+    def chemin(self, url, sha256, extension=EXTENSION) -> Path:
+        return Path(self.dossier) / f'{cle_url(url)}-{sha256[:16]}.{extension}'
+
+    def chemin_meta(self, url) -> Path:
+        return Path(self.dossier) / f'{cle_url(url)}.json'
+
+    def lire(self, url, sha256) -> object:
+        """Retourne le DF en cache, ou None s'il est absent ou illisible."""
+        for extension in (EXTENSION, 'pkl'):
+            chemin = self.chemin(url, sha256, extension)
+            if not chemin.exists():
+                continue
+            try:
+                df = pd.read_parquet(chemin) if extension == 'parquet' else pd.read_pickle(chemin)
+            except Exception as err:
+                print('Cache SPF illisible : ', chemin, err)
+                continue
+            os.utime(chemin)  # L'âge d'éviction part de la dernière lecture.
+            return df
+        return None
+
+    def ecrire(self, url, sha256, df) -> Path:
+        os.makedirs(self.dossier, exist_ok=True)
+        chemin = self.chemin(url, sha256)
+        try:
+            if EXTENSION == 'parquet':
+                df.to_parquet(chemin, index=False)
+            else:
+                df.to_pickle(chemin)
+        except Exception as err:  # Ex. colonne :object: mélangeant :int: et :str:, refusée par Parquet.
+            print('Cache SPF en pickle : ', chemin, err)
+            chemin = self.chemin(url, sha256, 'pkl')
+            df.to_pickle(chemin)
+        self.evincer()
+        return chemin
+
+    def lire_meta(self, url) -> dict:
+        try:
+            with open(self.chemin_meta(url), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return dict()
+
+    def ecrire_meta(self, url, **meta) -> None:
+        os.makedirs(self.dossier, exist_ok=True)
+        with open(self.chemin_meta(url), 'w', encoding='utf-8') as f:
+            json.dump({'url': url, 'date': time.time(), **meta}, f)
+
+    def evincer(self) -> None:
+        """Supprime les DF trop anciens, puis les moins récemment lus jusqu'à respecter le budget disque."""
+        if not os.path.exists(self.dossier):
+            return
+        fichiers = [(f.stat().st_mtime, f.stat().st_size, f) for f in Path(self.dossier).iterdir()
+                    if f.suffix in ('.parquet', '.pkl')]
+        limite = time.time() - self.age_max.total_seconds()
+        total = 0
+        for mtime, taille, fichier in sorted(fichiers, reverse=True):  # Du plus récent au plus ancien
+            if mtime < limite or total + taille > self.budget_octets:
+                fichier.unlink(missing_ok=True)
+            else:
+                total += taille
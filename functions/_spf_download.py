@@ -0,0 +1,216 @@
+"""Téléchargement conditionnel des CSV de Santé publique France.
+
+Le téléchargement est asynchrone et en flux (functions._http), le parsing s'exécute dans un thread.
+Chaque requête envoie les en-têtes If-None-Match / If-Modified-Since obtenus lors de la précédente.
+Une réponse 304 évite le téléchargement, et une empreinte SHA-256 du contenu évite de parser un fichier identique.
+Pour savoir si de nouvelles données sont publiées, dernier_jour() ne lit que la fin du fichier (requête Range).
+Les DF parsés sont conservés sur disque par functions._spf_cache, et survivent donc à un redémarrage.
+"""
+
+
+import asyncio, datetime, time
+from collections import Counter
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from functions._http import Reponse, Telechargeur, telechargeur
+from functions._spf_cache import SpfCache
+from functions._spf_ingestion import ingerer
+from functions._spf_schemas import SCHEMAS
+from functions._timer import mesure
+
+
+TAILLE_SONDE = 16 * 1024  # Octets lus en fin de fichier par dernier_jour()
+
+
+@dataclass
+class EtatUrl:
+    '''Dernier état connu d'une URL.'''
+    etag:          str = None
+    last_modified: str = None
+    sha256:        str = None
+    df:            object = None
+    ingestion:     object = None  # functions._spf_ingestion.Ingestion de la dernière modification
+    verifie_le:    float = 0.  # time.time() de la dernière requête
+    entete:        list = None  # Noms des colonnes, pour la sonde de fin de fichier
+    cle_cache:     str = None  # Clé du DF dans le cache disque, voir SpfFetcher.cle_cache()
+    restaure:      bool = False  # True une fois le DF du cache disque lu, voir SpfFetcher.restaurer()
+
+
+@dataclass
+class SpfFetcher:
+    '''Télécharge un CSV seulement s'il a changé depuis la dernière requête.'''
+    http:      Telechargeur = field(default_factory=lambda: telechargeur)
+    cache:     SpfCache = field(default_factory=SpfCache)
+    etats:     dict = field(default_factory=dict)
+    compteurs: Counter = field(default_factory=Counter)  # Issue de chaque appel, pour la commande !perf
+
+    __slots__ = '__dict__',
+
+    def etat(self, url) -> EtatUrl:
+        """État en mémoire, créé au premier accès depuis les métadonnées du cache disque, sans le DF (voir restaurer())."""
+        if url not in self.etats:
+            meta = self.cache.lire_meta(url)
+            self.etats[url] = EtatUrl(etag=meta.get('etag'), last_modified=meta.get('last_modified'),
+                                      sha256=meta.get('sha256'), cle_cache=meta.get('cle_cache', url))
+        return self.etats[url]
+
+    async def restaurer(self, url) -> EtatUrl:
+        """État de l'URL, avec le DF du cache disque au premier appel.
+
+        Note:
+            La lecture du Parquet s'exécute dans un thread, hors de la boucle d'événements.
+        """
+        etat = self.etat(url)
+        if not etat.restaure:
+            etat.restaure = True
+            if etat.sha256 and etat.df is None:
+                etat.df = await asyncio.to_thread(self.cache.lire, etat.cle_cache, etat.sha256)
+        return etat
+
+    async def telecharger(self, url) -> Reponse:
+        """Requête conditionnelle, en flux vers un fichier temporaire (voir functions._http).
+
+        Returns:
+            reponse (functions._http.Reponse): Sans chemin si le serveur répond 304 (Not Modified).
+
+        Note:
+            Les en-têtes sont conservés lors des redirections de data.gouv.fr vers static.data.gouv.fr.
+            Les nouveaux ETag / Last-Modified ne sont retenus qu'une fois le contenu parsé (voir valider()) :
+            après un échec, la requête suivante télécharge à nouveau le fichier au lieu de recevoir un 304.
+        """
+        etat = self.etat(url)
+        headers = dict()
+        if etat.df is not None:  # Sans DF en mémoire, un 304 serait inutilisable.
+            if etat.etag:          headers['If-None-Match'] = etat.etag
+            if etat.last_modified: headers['If-Modified-Since'] = etat.last_modified
+
+        try:
+            return await self.http.telecharger(url, headers)
+        finally:
+            etat.verifie_le = time.time()
+
+    @staticmethod
+    def cle_cache(url, schema=None) -> str:
+        '''Le DF en cache dépend aussi du schéma utilisé pour le parser.'''
+        return url if schema is None else f'{url}#{schema[0]}'
+
+    def valider(self, url, reponse, cle_cache) -> None:
+        '''Retient les en-têtes de la réponse, une fois son contenu parsé et mis en cache.'''
+        etat = self.etat(url)
+        etat.etag, etat.last_modified = reponse.etag, reponse.last_modified
+        self.cache.ecrire_meta(url, etag=etat.etag, last_modified=etat.last_modified, sha256=etat.sha256,
+                               cle_cache=cle_cache)
+
+    def parser(self, url, reponse, cles=None, cle_zone=None, schema=None, **read_csv_kwargs) -> pd.DataFrame:
+        """Parse le fichier téléchargé, ou le reprend du cache disque. Bloquant : exécuté dans un thread.
+
+        Args:
+            cles (list), cle_zone (str): Si renseignés, le nouveau DF est fusionné de façon incrémentale
+                                         dans la copie en cache (voir functions._spf_ingestion).
+            schema (tuple): (nom, zone) dans functions._spf_schemas.SCHEMAS, par ex. ('vacsi', 'dep').
+                            Remplace read_csv_kwargs et fournit les clés d'ingestion.
+        """
+        etat = self.etat(url)
+        cle_cache = self.cle_cache(url, schema)
+        df = self.cache.lire(cle_cache, reponse.sha256)
+        self.compteurs['cache_disque' if df is not None else 'parsing'] += 1
+        etat.ingestion = None
+        if df is None:
+            with mesure('parsing'):
+                if schema is None:
+                    df = pd.read_csv(reponse.chemin, **read_csv_kwargs)
+                else:
+                    nom, cle_zone = schema
+                    df = SCHEMAS[nom].lire_csv(reponse.chemin, cle_zone)
+                    cles = SCHEMAS[nom].cles_ingestion(cle_zone) if SCHEMAS[nom].incremental else None
+            if cles and cle_zone:
+                with mesure('ingestion'):
+                    etat.ingestion = ingerer(etat.df, df, cles, cle_zone)
+                    etat.ingestion.depuis = etat.sha256
+                df = etat.ingestion.df
+            self.cache.ecrire(cle_cache, reponse.sha256, df)
+        etat.df, etat.sha256, etat.cle_cache = df, reponse.sha256, cle_cache
+        self.valider(url, reponse, cle_cache)
+        return df
+
+    async def __call__(self, url, revalidation=0, **kwargs) -> tuple:
+        """Télécharge puis parse le CSV uniquement si son contenu a changé.
+
+        Args:
+            revalidation (int): En secondes. Si le CSV a été vérifié plus récemment, aucune requête n'est envoyée.
+            kwargs : Voir parser().
+
+        Returns:
+            (modifie, df) (tuple): modifie (bool) vaut False si le DF provient de la mémoire ou du disque.
+        """
+        etat = await self.restaurer(url)
+        if self.frais(url, revalidation):
+            self.compteurs['memoire'] += 1
+            return False, etat.df
+
+        reponse = await self.telecharger(url)
+        if reponse.chemin is None:
+            self.compteurs['304'] += 1
+            return False, etat.df
+        try:
+            if reponse.sha256 == etat.sha256 and etat.df is not None:  # Serveur sans ETag ni Last-Modified
+                self.compteurs['identique'] += 1
+                self.valider(url, reponse, self.cle_cache(url, kwargs.get('schema')))
+                return False, etat.df
+            # Parsing bloquant : exécuté hors de la boucle d'événements.
+            return True, await asyncio.to_thread(self.parser, url, reponse, **kwargs)
+        finally:
+            reponse.supprimer()
+
+    async def dernier_jour(self, url, colonne='jour', sep=';', octets=TAILLE_SONDE) -> datetime.date:
+        """Date la plus récente des dernières lignes du CSV, sans le télécharger.
+
+        Note:
+            Les CSV de SPF sont triés par date en pratique : les dernières lignes suffisent.
+
+        Returns:
+            jour (datetime.date): None si le serveur ne gère pas les requêtes partielles,
+                                  l'appelant se rabat alors sur un téléchargement complet.
+        """
+        etat = self.etat(url)
+        if etat.entete is None:
+            debut = await self.http.extrait(url, f'bytes=0-{octets - 1}')
+            if debut is None:
+                return None
+            etat.entete = debut.decode('utf-8-sig').splitlines()[0].replace('"', '').split(sep)
+
+        fin = await self.http.extrait(url, f'bytes=-{octets}')
+        if fin is None:
+            return None
+        lignes = fin.decode('utf-8', errors='ignore').splitlines()[1:]  # La première ligne est tronquée.
+        index = etat.entete.index(colonne)
+        jours = set()
+        for ligne in lignes:
+            valeurs = ligne.replace('"', '').split(sep)
+            if len(valeurs) == len(etat.entete):
+                try:
+                    jours.add(datetime.date.fromisoformat(valeurs[index][:10]))
+                except ValueError:
+                    continue
+        return max(jours, default=None)
+
+    def frais(self, url, revalidation) -> bool:
+        '''True si le DF en mémoire a été vérifié il y a moins de revalidation secondes.'''
+        etat = self.etats.get(url)
+        return etat is not None and etat.df is not None and time.time() - etat.verifie_le < revalidation
+
+    def ingestion(self, url):
+        '''Dernière ingestion incrémentale de l'URL, ou None.'''
+        etat = self.etats.get(url)
+        return etat.ingestion if etat else None
+
+    def empreinte(self, url) -> str:
+        '''SHA-256 du dernier contenu téléchargé, ou None.'''
+        etat = self.etats.get(url)
+        return etat.sha256 if etat else None
+
+
+# Instance partagée par les cogs
+spf_fetcher = SpfFetcher()
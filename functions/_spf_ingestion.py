@@ -0,0 +1,81 @@
+"""Ingestion incrémentale des CSV de Santé publique France.
+
+Les fichiers ne grandissent que d'un jour, avec parfois des révisions de l'historique.
+On compare le nouveau DF à la copie en cache : seules les lignes des nouveaux jours sont ajoutées,
+et seules les zones dont l'historique a été révisé sont remplacées.
+"""
+
+
+from dataclasses import dataclass, field
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+@dataclass
+class Ingestion:
+    '''Résultat d'une ingestion.'''
+    df:             object  # DF complet à jour
+    nouveaux:       object  # Lignes des jours absents du cache
+    cle_zone:       str
+    zones_revisees: set = field(default_factory=set)  # Zones dont au moins une ligne historique a changé
+    complete:       bool = False  # True si tout a été rechargé (pas de cache ou clés inutilisables)
+    depuis:         str = None  # Empreinte de la version à laquelle l'ingestion s'applique, voir SpfFetcher.parser()
+
+
+def concat(dfs, cle_zone) -> pd.DataFrame:
+    """pandas.concat qui conserve la colonne de zone en :category:.
+
+    Note:
+        Des colonnes :category: aux catégories différentes (par ex. un département apparu dans le nouveau CSV)
+        seraient concaténées en :object: : leurs catégories sont d'abord réunies.
+    """
+    if all(isinstance(df[cle_zone].dtype, pd.CategoricalDtype) for df in dfs):
+        dtype = pd.CategoricalDtype(union_categoricals([df[cle_zone] for df in dfs], ignore_order=True).categories)
+        dfs = [df.astype({cle_zone: dtype}) for df in dfs]
+    return pd.concat(dfs, ignore_index=True)
+
+
+def ingerer(ancien, nouveau, cles, cle_zone) -> Ingestion:
+    """Fusionne le nouveau DF dans l'ancien.
+
+    Args:
+        ancien (pandas.DataFrame): Copie en cache, ou None.
+        nouveau (pandas.DataFrame): DF tout juste parsé.
+        cles (list): Colonnes identifiant une ligne, par ex. ['dep', 'sexe', 'jour'].
+        cle_zone (str): Colonne de la zone géographique, par ex. 'dep'.
+
+    Returns:
+        Ingestion
+    """
+    if ancien is None or ancien.empty or list(ancien.columns) != list(nouveau.columns):
+        return Ingestion(df=nouveau, nouveaux=nouveau, cle_zone=cle_zone, complete=True)
+
+    jour_max = ancien['jour'].max()
+    nouveaux = nouveau[nouveau['jour'] > jour_max]
+
+    # Comparer l'historique ligne à ligne, aligné sur les clés.
+    hist_nouveau = nouveau[nouveau['jour'] <= jour_max].set_index(cles)
+    hist_ancien = ancien.set_index(cles)
+    if not (hist_nouveau.index.is_unique and hist_ancien.index.is_unique):
+        return Ingestion(df=nouveau, nouveaux=nouveau, cle_zone=cle_zone, complete=True)
+
+    # Lignes supprimées de l'historique
+    supprimees = hist_ancien.index.difference(hist_nouveau.index)
+    zones_revisees = set(supprimees.get_level_values(cle_zone))
+
+    # Lignes modifiées ou ajoutées dans l'historique
+    hist_ancien = hist_ancien.reindex(index=hist_nouveau.index, columns=hist_nouveau.columns)
+    identiques = (hist_nouveau == hist_ancien) | (hist_nouveau.isna() & hist_ancien.isna())
+    revisees = hist_nouveau.index[~identiques.all(axis=1)]
+    zones_revisees |= set(revisees.get_level_values(cle_zone))
+
+    # Conserver la copie en cache, sauf pour les zones révisées, puis ajouter les nouveaux jours.
+    if zones_revisees:
+        df = concat([ancien[~ancien[cle_zone].isin(zones_revisees)],
+                     nouveau[nouveau[cle_zone].isin(zones_revisees) & (nouveau['jour'] <= jour_max)],
+                     nouveaux], cle_zone)
+    else:
+        df = concat([ancien, nouveaux], cle_zone)
+
+    return Ingestion(df=df, nouveaux=nouveaux, cle_zone=cle_zone, zones_revisees=zones_revisees)
@@ -0,0 +1,63 @@
+"""Registre des schémas des CSV de Santé publique France.
+
+Chaque schéma fixe les colonnes lues (usecols), leur type dès le parsing (dtype) et les codes géographiques
+en :category:. Le moteur pyarrow est utilisé s'il est installé.
+
+Les mesures sont en float32, y compris les effectifs : les fichiers de SPF contiennent des cellules vides,
+qu'un entier non nullable refuse. Les codes géographiques sont lus en texte ('01' et non 1), puis convertis.
+"""
+
+
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    ENGINE = 'pyarrow'
+except ImportError:
+    ENGINE = 'c'
+
+
+@dataclass(frozen=True)
+class Schema:
+    colonnes:  dict  # {colonne: dtype}, hors colonne de zone et 'jour'
+    cles:      tuple  # Colonnes identifiant une ligne, hors colonne de zone
+    filtre:    dict = field(default_factory=dict)  # {colonne: valeur} conservée, puis colonne supprimée
+    incremental: bool = False  # Ingestion incrémentale (functions._spf_ingestion), pour les DF mis à jour en aval
+
+    def read_csv_kwargs(self, zone) -> dict:
+        """Arguments de pandas.read_csv pour la colonne de zone donnée ('fra', 'reg' ou 'dep')."""
+        dtype = {zone: str, **self.colonnes}  # pyarrow déduirait des catégories entières d'une colonne 'category'.
+        kwargs = {'sep': ';', 'usecols': [zone, 'jour', *self.colonnes], 'dtype': dtype,
+                  'parse_dates': ['jour'], 'engine': ENGINE}
+        if ENGINE == 'c':
+            kwargs['low_memory'] = False
+        return kwargs
+
+    def lire_csv(self, source, zone) -> pd.DataFrame:
+        df = pd.read_csv(source, **self.read_csv_kwargs(zone))
+        df[zone] = df[zone].astype('category')
+        for colonne, valeur in self.filtre.items():
+            df = df[df[colonne] == valeur].drop(columns=colonne)
+        return df.reset_index(drop=True)
+
+    def cles_ingestion(self, zone) -> list:
+        return [zone, *(cle for cle in self.cles if cle not in self.filtre), 'jour']
+
+
+SCHEMAS = {
+    # donnees-hospitalieres-covid19 : seules les lignes tous sexes confondus (sexe == 0) sont utilisées.
+    'hospitalisation': Schema(colonnes={'sexe': 'int8', 'hosp': 'float32', 'rea': 'float32', 'HospConv': 'float32',
+                                        'SSR_USLD': 'float32', 'autres': 'float32', 'rad': 'float32', 'dc': 'float32'},
+                              cles=('sexe',),
+                              filtre={'sexe': 0},
+                              incremental=True),  # model.cube_hospitalisation
+    # vacsi-a-fra / vacsi-a-reg / vacsi-a-dep
+    'vacsi': Schema(colonnes={'clage_vacsi': 'int8', 'couv_dose1': 'float32', 'couv_complet': 'float32',
+                              'couv_rappel': 'float32'},
+                    cles=('clage_vacsi',)),
+    # sp-pos-quot-fra / sp-pos-quot-reg / sp-pos-quot-dep
+    'sp-pos-quot': Schema(colonnes={'cl_age90': 'int8', 'P': 'float32', 'T': 'float32'},
+                          cles=('cl_age90',)),
+}
@@ -1,5 +1,123 @@
-import asyncio, functools, time
+"""Mesure des durées d'exécution.
+
+timer() mesure une fonction entière. mesure() mesure une étape (téléchargement, parsing, filtrage, pivot, rendu,
+encodage, téléversement, modification Discord) : les étapes s'imbriquent, y compris entre coroutines, grâce à une
+contextvars.ContextVar, et alimentent un histogramme par étape, exportable au format texte de Prometheus ou en JSON.
+"""
+
+
+import asyncio, bisect, contextvars, functools, json, os, time
+from collections import deque
 from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+BORNES = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 120, 300)  # En secondes, comme Prometheus
+NB_ECHANTILLONS = 256  # Dernières durées conservées par étape, pour les quantiles
+EXPORT_DIR = Path('./data/mesures')
+
+# Chemin de l'étape en cours, par ex. ('check_update', 'telechargement'). Propre à chaque tâche asyncio.
+_etapes = contextvars.ContextVar('etapes', default=())
+
+
+@dataclass
+class Histogramme:
+    compteurs:    list = field(default_factory=lambda: [0] * (len(BORNES) + 1))  # Dernier : au-delà de BORNES
+    nombre:       int = 0
+    somme:        float = 0.
+    derniere:     float = None
+    echantillons: deque = field(default_factory=lambda: deque(maxlen=NB_ECHANTILLONS))
+
+    __slots__ = '__dict__',
+
+    def ajouter(self, duree) -> None:
+        self.compteurs[bisect.bisect_left(BORNES, duree)] += 1
+        self.nombre += 1
+        self.somme += duree
+        self.derniere = duree
+        self.echantillons.append(duree)
+
+    def quantile(self, q) -> float:
+        """Quantile des dernières durées, par ex. q=.95. None sans mesure."""
+        if not self.echantillons:
+            return None
+        echantillons = sorted(self.echantillons)
+        return echantillons[min(len(echantillons) - 1, int(q * len(echantillons)))]
+
+
+@dataclass
+class Mesures:
+    histogrammes: dict = field(default_factory=dict)  # {étape: Histogramme}
+    journal:      deque = field(default_factory=lambda: deque(maxlen=10_000))  # [(chemin, durée)] depuis le dernier vider()
+
+    __slots__ = '__dict__',
+
+    def enregistrer(self, chemin, duree) -> None:
+        """Args:
+            chemin (tuple): Étapes englobantes puis étape mesurée, par ex. ('check_update', 'rendu').
+        """
+        self.histogrammes.setdefault(chemin[-1], Histogramme()).ajouter(duree)
+        self.journal.append((chemin, duree))
+
+    def vider(self) -> list:
+        '''Retourne et efface le journal des étapes.'''
+        journal = list(self.journal)
+        self.journal.clear()
+        return journal
+
+    def prometheus(self) -> str:
+        lignes = ['# HELP covid_etape_secondes Durée des étapes de publication.',
+                  '# TYPE covid_etape_secondes histogram']
+        for etape, histogramme in sorted(self.histogrammes.items()):
+            cumul = 0
+            for borne, compteur in zip([*map(str, BORNES), '+Inf'], histogramme.compteurs):
+                cumul += compteur
+                lignes.append(f'covid_etape_secondes_bucket{{etape="{etape}",le="{borne}"}} {cumul}')
+            lignes.append(f'covid_etape_secondes_sum{{etape="{etape}"}} {histogramme.somme}')
+            lignes.append(f'covid_etape_secondes_count{{etape="{etape}"}} {histogramme.nombre}')
+        return '\n'.join(lignes) + '\n'
+
+    def exporter_prometheus(self, chemin=EXPORT_DIR / 'covid.prom') -> Path:
+        """Écrit le fichier texte lu par le collecteur de fichiers texte de node_exporter."""
+        os.makedirs(Path(chemin).parent, exist_ok=True)
+        temporaire = Path(chemin).with_suffix('.tmp')
+        temporaire.write_text(self.prometheus(), encoding='utf-8')
+        os.replace(temporaire, chemin)  # Le collecteur ne lit jamais un fichier à moitié écrit.
+        return Path(chemin)
+
+    def exporter_json(self, chemin=EXPORT_DIR / 'etapes.jsonl') -> Path:
+        """Ajoute au journal JSON une ligne par étape mesurée depuis le dernier export."""
+        os.makedirs(Path(chemin).parent, exist_ok=True)
+        with open(chemin, 'a', encoding='utf-8') as f:
+            for etapes, duree in self.vider():
+                f.write(json.dumps({'ts': time.time(), 'chemin': '/'.join(etapes), 'duree': round(duree, 6)}) + '\n')
+        return Path(chemin)
+
+
+# Instance du processus. Les processus de rendu renvoient leurs mesures au processus principal (functions._rendu).
+mesures = Mesures()
+
+
+@contextmanager
+def mesure(etape):
+    """Mesure le bloc avec time.perf_counter, sous l'étape englobante éventuelle.
+
+    Note:
+        Utilisable autour de await : chaque tâche asyncio a son propre chemin d'étapes.
+    """
+    chemin = (*_etapes.get(), etape)
+    jeton = _etapes.set(chemin)
+    debut = time.perf_counter()
+    try:
+        yield chemin
+    finally:
+        mesures.enregistrer(chemin, time.perf_counter() - debut)
+        _etapes.reset(jeton)
+
+
+def chemin_courant() -> tuple:
+    return _etapes.get()
 
 
 def timer(title=None):
@@ -8,9 +126,10 @@ def timer(title=None):
         inner_title = func.__name__ if title is None else title
         @contextmanager
         def wrapping_logic():
-            start_ts = time.time()
-            yield
-            dur = time.time() - start_ts
+            start_ts = time.perf_counter()
+            with mesure(inner_title):
+                yield
+            dur = time.perf_counter() - start_ts
             print(f'{inner_title} exécuté en {dur:.2} secondes.')
 
         @functools.wraps(func)
@@ -1,19 +1,33 @@
-import os, sys
+import os, sys, threading
 from abc import ABC
 from copy import deepcopy
 from dataclasses import dataclass, field
-from pathlib import Path
 
 import pandas as pd
-from matplotlib import pyplot as plt
 from matplotlib import ticker
+from matplotlib.artist import setp
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import matplotlib.dates as mdates
 
+from functions._rendu import png, rendre
+from functions._timer import mesure
 from settings import locale_float_digits, MESSAGES_IDS_COVID, PANDAS_SPF_SPECS
 # PANDAS_SPF_SPECS = {'sep': ';', 'parse_dates': ['jour'], 'low_memory': False}
 
 
-PATH_DIR = os.getcwd() if __name__ == '__main__' else Path('./data/temp/vaccination/âge')
+GABARITS = dict()  # {(classe, nombre de plots, thread): Gabarit}, propre à chaque processus de rendu
+
+
+@dataclass
+class Gabarit:
+    '''Figure réutilisable d'un rendu à l'autre.'''
+    fig:         Figure
+    axes:        list  # Plots utilisés, un par tranche d'âges
+    lignes:      dict  # {(numéro du plot, clé de DICT_MAIN): Line2D}
+    annotations: dict  # {(numéro du plot, clé de DICT_MAIN): (Annotation première valeur, Annotation dernière valeur)}
+    suptitle:    object
+    pied_page:   object
 
 
 @dataclass()
@@ -31,16 +45,44 @@ class AgeModele(ABC):
 
         self.color_hex = int(f'0x{self.color_str[1:]}', 16)
 
-    async def creer_image(self) -> Path:
+    async def creer_image(self) -> bytes:
         '''Graphique de l'évolution de la vaccination par tranche d'âges pour chaque zone géographique.'''
 
-        df = self.df_main
-        df = df[df['jour'] >= str(df['jour'].unique()[-45])]
+        with mesure('filtrage'):
+            df = self.df_main
+            df = df[df['jour'] >= str(df['jour'].unique()[-45])]
 
-        dict_main = deepcopy(self.DICT_MAIN)
-
-        df = df[['jour', self.CLAGE] + [*dict_main]]
+            # Seule une tranche compacte du DF est sérialisée vers le processus de rendu.
+            self.df_main = df[['jour', self.CLAGE] + [*self.DICT_MAIN]]
         # df.info(memory_usage="deep")
+        self.png, self.jour = await rendre(self.dessiner)
+
+        return self.png
+
+    def dessiner(self) -> tuple:
+        """Crée le graphique. Exécuté dans un processus de rendu (functions._rendu).
+
+        Note:
+            La structure de la figure (grille, axes, formats de dates, courbes, légende) provient d'un gabarit
+            réutilisé d'une zone à l'autre : seules les données, les annotations et les textes sont mis à jour.
+
+        Returns:
+            (png, jour) (tuple): Octets de l'image PNG et date de la dernière donnée.
+        """
+
+        with mesure('pivot'):
+            dict_main = self.pivoter()
+        nb_plots = len(dict_main[list(dict_main)[0]]['df_rev'].columns)
+        with mesure('trace'):
+            gabarit = self.gabarit(nb_plots)
+            self.mettre_a_jour(gabarit, dict_main)
+        return png(gabarit.fig, bbox_inches='tight'), self.jour
+
+    def pivoter(self) -> dict:
+        """Pivote le DF : pour chaque clé de DICT_MAIN, un DF 'df_rev' avec une colonne par tranche d'âges."""
+
+        df = self.df_main
+        dict_main = deepcopy(self.DICT_MAIN)
 
         # Dans chaque DF, on remplace le nom actuel de la colonne par des libellés explicites.
         def age_num_2_str(df, colonne):
@@ -63,35 +105,39 @@ class AgeModele(ABC):
 
         columns_dict = age_num_2_str(df, self.CLAGE)
 
-        # Depuis le même DF, on sépare en 3 DF la couverture 1 dose, la couverture complète et les rappels.
-        df_pivot = lambda values: df.pivot(index='jour', columns=self.CLAGE, values=values)
-
         # On crée un DF par type de couverture et par classe d'âges.
         for key, val in dict_main.items():
-            df_pivot_key = df_pivot(key)
-            val['df_rev'] = df_pivot_key.rename(columns=columns_dict)
+            val['df_rev'] = df.pivot(index='jour', columns=self.CLAGE, values=key).rename(columns=columns_dict)
+        return dict_main
+
+    def gabarit(self, nb_plots) -> 'Gabarit':
+        """Gabarit de la classe pour ce nombre de tranches d'âges, créé au premier rendu.
+
+        Note:
+            Une figure ne pouvant être dessinée que par un thread à la fois, chaque thread a ses gabarits.
+        """
+        cle = (type(self).__name__, nb_plots, threading.get_ident())
+        if cle not in GABARITS:
+            GABARITS[cle] = self.creer_gabarit(nb_plots)
+        return GABARITS[cle]
+
+    def creer_gabarit(self, nb_plots) -> 'Gabarit':
+        '''Partie statique de la figure : grille, cadres, formats des axes, courbes vides, annotations et légende.'''
+
+        fig = Figure(figsize=self.FIGSIZE)
+        FigureCanvasAgg(fig)
 
         # On crée les plots
-        fig, axes = plt.subplots(figsize=self.FIGSIZE, nrows=self.NROWS, ncols=self.NCOLS)
+        axes = fig.subplots(nrows=self.NROWS, ncols=self.NCOLS)
 
         # plt.gcf().autofmt_xdate()  # Formattage si besoin
         # plt.xticks(rotation=0)  # Rotation de la date
-        plt.tight_layout()
+        fig.tight_layout()
         fig.subplots_adjust(left=None, bottom=0.175, top=.85, right=0.9, wspace=.7, hspace=.7)
 
-        # Des caractéristiques générales du tableau
-        fig.suptitle(f'{self.TITRE_GRAPH}\n'
-                     f'depuis 45 jours jusqu\'au {pd.Timestamp(df["jour"].max()).strftime("%A %x")}\n'
-                     f'{self.particule} {self.localisation}',
-                     fontsize=14)
-        fig.set_facecolor(self.color_str)
-
-        # Date du jour pour l'embed et le graphique
-        self.__setattr__('jour', pd.Timestamp(df["jour"].max()).strftime("%A %x"))
-
-        # Infos en pied de page
-        pied_page_texte = self.PIED_PAGE_TEXTE + f'Dernière donnée : {self.jour}'
-        fig.text(self.PIED_PAGE_X, self.PIED_PAGE_Y, pied_page_texte, ha='left')
+        # Textes mis à jour à chaque rendu
+        suptitle = fig.suptitle('', fontsize=14)
+        pied_page = fig.text(self.PIED_PAGE_X, self.PIED_PAGE_Y, '', ha='left')
 
         # Nécessaire pour boucler chaque plot
         axes = axes.reshape(-1)
@@ -99,34 +145,94 @@ class AgeModele(ABC):
         # Mettre le 1er plot dans un cadre formatté différemment pour le démarquer, car il regroupe tous les âges.
         [axes[0].spines[elem].set_linewidth(3) for elem in ['bottom', 'top', 'left', 'right']]
 
+        lignes, annotations = dict(), dict()
+        for m, ax in enumerate(axes):
+            # Plots en trop par rapport au nombre de tranches d'âges
+            if m >= nb_plots:
+                fig.delaxes(ax)
+                continue
+
+            ax.xaxis_date()
+            ax.grid('on', axis='both', linestyle='-', linewidth=0.35)
+            ax.patch.set_facecolor('w')
+            ax.set_xlabel('')
+
+            # Intervalle et formattage de la date
+            ax.tick_params(axis='x', which='major', labelsize=9)
+            # Chaque mois commence le 1er jour du mois
+            locator = mdates.AutoDateLocator()
+            formatter = mdates.ConciseDateFormatter(locator)
+            formatter.formats = ['%y',  # ticks are mostly years
+                                 '%d\n%b',  # ticks are mostly months
+                                 '%d',  # ticks are mostly days
+                                 '%H:%M',  # hrs
+                                 '%H:%M',  # min
+                                 '%S.%f', ]  # secs
+            # these are mostly just the level above...
+            formatter.zero_formats = [''] + formatter.formats[:-1]
+            # ...except for ticks that are mostly hours, then it is nice to have
+            # month-day:
+            # formatter.zero_formats[3] = '%d-%b'
+
+            formatter.offset_formats = ['', '', '', '', '', '', '']
+            ax.xaxis.set_major_locator(locator)
+            ax.xaxis.set_major_formatter(formatter)
+            setp(ax.xaxis.get_majorticklabels(), rotation=0, ha='left')
+
+            # Séparateur de millier
+            ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda x, loc: locale_float_digits(x, 0)))
+
+            # Une courbe et deux annotations (première et dernière valeurs) par clé de DICT_MAIN
+            for key, val in self.DICT_MAIN.items():
+                lignes[m, key], = ax.plot([], [], color=val['couleur'], linestyle=val['linestyle'], label=val['label'])
+                annotations[m, key] = tuple(ax.annotate('', xy=(0, 0), xytext=val['xytext'], xycoords='data',
+                                                        textcoords='offset points', color=val['couleur'])
+                                            for date_ in (0, -1))
+
+        # Insérer la légende
+        axes[0].legend(loc='center', bbox_to_anchor=(.171, .945), bbox_transform=fig.transFigure, facecolor='white',
+                       framealpha=1)
 
+        return Gabarit(fig=fig, axes=axes[:nb_plots], lignes=lignes, annotations=annotations,
+                       suptitle=suptitle, pied_page=pied_page)
 
-        def plotter_annoter(**kwargs) -> None:
-            '''Trace et annote chaque plot.
+    def mettre_a_jour(self, gabarit, dict_main) -> None:
+        '''Partie variable de la figure : couleur, textes, données des courbes, limites et annotations.'''
 
-            Note:
-                Fonction utilisée dans la boucle juste après.
-            '''
+        df = self.df_main
+        fig = gabarit.fig
+
+        # Des caractéristiques générales du tableau
+        gabarit.suptitle.set_text(f'{self.TITRE_GRAPH}\n'
+                                  f'depuis 45 jours jusqu\'au {pd.Timestamp(df["jour"].max()).strftime("%A %x")}\n'
+                                  f'{self.particule} {self.localisation}')
+        fig.set_facecolor(self.color_str)
 
-            def plotter(df_rev, couleur, linestyle, label, **kwargs) -> None:
-                '''Tracer les courbes.'''
-                ax.plot(df_rev[df_rev.columns[m]], color=couleur, linestyle=linestyle, label=label)
+        # Date du jour pour l'embed et le graphique
+        self.__setattr__('jour', pd.Timestamp(df["jour"].max()).strftime("%A %x"))
 
-            def annoter(df_rev, xytext, couleur, **kwargs) -> None:
-                '''Annoter les premières et dernières valeurs.'''
-                for date_ in [0, -1]:
-                    var_couv = df_rev[df_rev.columns[m]].iat[date_]
-                    # Formule pour formatter les pourcentages ou les séparateurs de milliers
-                    locale_value = lambda x: locale_float_digits(round(x, 0), 0) + ('%' if self.FMT_POURCENTAGE else '')
-                    ax.annotate(locale_value(var_couv),
-                                xy=(mdates.date2num(pd.Timestamp(df['jour'].iat[date_])), var_couv),
-                                xytext=xytext, xycoords='data', textcoords='offset points', color=couleur)
+        # Infos en pied de page
+        gabarit.pied_page.set_text(self.PIED_PAGE_TEXTE + f'Dernière donnée : {self.jour}')
 
-            plotter(**kwargs)
-            annoter(**kwargs)
+        # Formule pour formatter les pourcentages ou les séparateurs de milliers
+        locale_value = lambda x: locale_float_digits(round(x, 0), 0) + ('%' if self.FMT_POURCENTAGE else '')
 
-        for m, ax in enumerate(axes):
+        for m, ax in enumerate(gabarit.axes):
             try:
+                ax.title.set_text(dict_main[list(dict_main)[0]]['df_rev'].columns[m])  # Correspond au libellé de chaque colonne
+
+                for key, val in dict_main.items():
+                    serie = val['df_rev'][val['df_rev'].columns[m]]
+                    gabarit.lignes[m, key].set_data(serie.index, serie.values)
+
+                    # Annoter les premières et dernières valeurs.
+                    for annotation, date_ in zip(gabarit.annotations[m, key], (0, -1)):
+                        var_couv = serie.iat[date_]
+                        annotation.set_text(locale_value(var_couv))
+                        annotation.xy = (mdates.date2num(pd.Timestamp(serie.index[date_])), var_couv)
+
+                ax.set_xlim(pd.Timestamp(df['jour'].min()), pd.Timestamp(df['jour'].max()))
+
                 # S'il faut modifier la limite du 1er plot ou la limite des autres plots
                 if (self.SET_YLIM_1ER_PLOT and not m) or (self.SET_YLIM_AUTRES_PLOTS and m):
                     if isinstance(self.SET_YLIM, int):
@@ -134,72 +240,16 @@ class AgeModele(ABC):
                     else:
                         ylim = df[self.SET_YLIM].max() // 3  # Limite à 1/3 du max total pour les autres plots
                         ax.set_ylim((0, ylim))
-
-                ax.set_xlim(pd.Timestamp(df['jour'].min()), pd.Timestamp(df['jour'].max()))
-                ax.grid('on', axis='both', linestyle='-', linewidth=0.35)
-                ax.patch.set_facecolor('w')
-                ax.set_xlabel('')
-
-                # Intervalle et formattage de la date
-                ax.xaxis.set_major_locator(mdates.DayLocator(interval=7))
-                ax.tick_params(axis='x', which='major', labelsize=9)
-                # Chaque mois commence le 1er jour du mois
-                locator = mdates.AutoDateLocator()
-                formatter = mdates.ConciseDateFormatter(locator)
-                formatter.formats = ['%y',  # ticks are mostly years
-                                     '%d\n%b',  # ticks are mostly months
-                                     '%d',  # ticks are mostly days
-                                     '%H:%M',  # hrs
-                                     '%H:%M',  # min
-                                     '%S.%f', ]  # secs
-                # these are mostly just the level above...
-                formatter.zero_formats = [''] + formatter.formats[:-1]
-                # ...except for ticks that are mostly hours, then it is nice to have
-                # month-day:
-                # formatter.zero_formats[3] = '%d-%b'
-
-                formatter.offset_formats = ['', '', '', '', '', '', '']
-                ax.xaxis.set_major_locator(locator)
-                ax.xaxis.set_major_formatter(formatter)
-
-                # Séparateur de millier
-                ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda x, loc: locale_float_digits(x, 0)))
-
-                def title_majorticklabel_plot_annot(dictionnaire):
-                    """"""
-                    ax.title.set_text(dictionnaire[list(dictionnaire)[0]]['df_rev'].columns[m])  # Correspond au libellé de chaque colonne
-                    plt.setp(ax.xaxis.get_majorticklabels(), rotation=0, ha='left')
-                    dict_plots = [dict_sub for dict_sub in dictionnaire.values()]
-                    [plotter_annoter(**kwargs) for kwargs in dict_plots]
-                title_majorticklabel_plot_annot(dict_main)
-
-            except IndexError:
-                fig.delaxes(ax)
+                else:
+                    ax.relim()
+                    ax.autoscale_view(scalex=False)
 
             except Exception as err:
                 exc_type, exc_obj, exc_tb = sys.exc_info()
                 fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
                 raise Exception(self.TITRE_COURT, err, exc_type, fname, exc_tb.tb_lineno)
 
-        # Insérer la légende
-        axes[0].legend(loc='center', bbox_to_anchor=(.171, .945), bbox_transform=fig.transFigure, facecolor='white',
-                       framealpha=1)
-
-        # Nom du graphique et enregistrement
-        if not os.path.exists(image_path_dir := PATH_DIR):
-            try:                      os.mkdir(image_path_dir)
-            except FileNotFoundError: image_path_dir = os.getcwd()  # FileNotFoundError depuis le cogs sur Windows
-        fichier_graphique = f'{self.TITRE_COURT} - {self.localisation}.png'
-        self.__setattr__('image_path', os.path.join(image_path_dir, fichier_graphique))
-        # Créer le fichier et le dossier s'ils n'existent pas
-
-        if not os.path.exists(self.image_path): open(self.image_path, 'x')
-
-        plt.savefig(self.image_path, bbox_inches='tight')
-
-        return self.image_path
-
-    async def __call__(self) -> Path:
+    async def __call__(self) -> bytes:
         try:
             return await self.creer_image()
         except Exception as err:
@@ -284,7 +334,7 @@ if __name__ == '__main__':
     df = pd.read_csv(URL_DF, infer_datetime_format=True, **PANDAS_SPF_SPECS)
     vac = VaccinModele(df, '#70E6E4', 'en', 'France')
     asyncio.run(vac())
-    print(vac.jour, vac.image_path)
+    print(vac.jour, len(vac.png))
 
     # Positifs aux tests
     URL_DF = 'https://www.data.gouv.fr/fr/datasets/r/406c6a23-e283-4300-9484-54e78c8ae675'
@@ -292,4 +342,4 @@ if __name__ == '__main__':
     df = df[df['dep'] == '92']
     positivite = PositiviteModele(df, '#fed6ff', 'dans les', 'Hauts-de-Seine')
     asyncio.run(positivite())
-    print(positivite.jour, positivite.image_path)
+    print(positivite.jour, len(positivite.png))
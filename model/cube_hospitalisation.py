@@ -0,0 +1,92 @@
+"""Cube pré-agrégé des hospitalisations, indexé par (niveau, code, jour).
+
+Chaque niveau géographique ('dep', 'reg', 'fra') contient toutes les mesures de DICT_COORD_Y.
+Le cube est mis à jour de façon incrémentale à partir d'une functions._spf_ingestion.Ingestion.
+"""
+
+
+from dataclasses import dataclass
+
+import pandas as pd
+
+from functions._zones import CODE_FRANCE
+from model.covid_hospitalisation import DICT_COORD_Y
+
+
+MESURES = [*DICT_COORD_Y]
+NIVEAUX = ['niveau', 'code', 'jour']
+
+
+def agreger(df, regions) -> pd.DataFrame:
+    """Agrège un DF départemental (colonnes dep, jour et MESURES) sur les trois niveaux.
+
+    Args:
+        df (pandas.DataFrame): Lignes départementales.
+        regions (dict): {code département: code région}. Les départements absents ne sont pas agrégés par région.
+
+    Returns:
+        cube (pandas.DataFrame): Index (niveau, code, jour), colonnes MESURES.
+    """
+    df = df[['dep', 'jour', *MESURES]].assign(dep=lambda x: x['dep'].astype(str))
+    dep = df.groupby(['dep', 'jour'])[MESURES].sum(min_count=1)
+    reg = (df.assign(reg=df['dep'].map(regions))
+             .dropna(subset=['reg'])
+             .groupby(['reg', 'jour'])[MESURES].sum(min_count=1))
+    fra = df.groupby('jour')[MESURES].sum(min_count=1)
+    fra.index = pd.MultiIndex.from_product([[CODE_FRANCE], fra.index])
+    return pd.concat({'dep': dep, 'reg': reg, 'fra': fra}, names=NIVEAUX).sort_index()
+
+
+@dataclass
+class CubeHospitalisation:
+    regions: dict  # {code département: code région}
+    df:      object = None
+
+    __slots__ = '__dict__',
+
+    def construire(self, df) -> None:
+        self.df = agreger(df, self.regions)
+
+    def mettre_a_jour(self, ingestion) -> None:
+        """Applique une ingestion : corrige les zones révisées puis ajoute les nouveaux jours.
+
+        Note:
+            Les régions et la France sont corrigées par différence, sans ré-agréger tout l'historique.
+        """
+        if self.df is None or ingestion.complete:
+            return self.construire(ingestion.df)
+
+        jour_max = self.df.index.get_level_values('jour').max()
+        revisees = sorted(str(zone) for zone in ingestion.zones_revisees)
+        if revisees:
+            df = ingestion.df
+            historique = df[df['dep'].astype(str).isin(revisees) & (df['jour'] <= jour_max)]
+            nouveau = agreger(historique, self.regions).loc['dep']
+            departements = self.df.loc['dep']
+            ancien = departements[departements.index.get_level_values('code').isin(revisees)]
+            delta = nouveau.sub(ancien, fill_value=0)
+
+            # Report de l'écart sur les régions et la France
+            delta_reg = (delta.assign(reg=delta.index.get_level_values('code').map(self.regions))
+                              .dropna(subset=['reg'])
+                              .groupby(['reg', 'jour'])[MESURES].sum())
+            delta_fra = delta.groupby('jour')[MESURES].sum()
+            delta_fra.index = pd.MultiIndex.from_product([[CODE_FRANCE], delta_fra.index])
+            delta = pd.concat({'reg': delta_reg, 'fra': delta_fra}, names=NIVEAUX)
+
+            index = self.df.index
+            revises = (index.get_level_values('niveau') == 'dep') & index.get_level_values('code').isin(revisees)
+            self.df = pd.concat([self.df[~revises].add(delta, fill_value=0),
+                                 pd.concat({'dep': nouveau}, names=NIVEAUX)])
+
+        if not ingestion.nouveaux.empty:
+            self.df = pd.concat([self.df, agreger(ingestion.nouveaux, self.regions)])
+        self.df = self.df.sort_index()
+
+    def zone(self, niveau, code) -> pd.DataFrame:
+        """Série chronologique d'une zone, indexée par 'jour', prête pour model.covid_hospitalisation.Hopital.
+
+        Note:
+            Le cube étant trié, la sélection est une tranche contiguë de l'index, sans copie de l'historique.
+        """
+        return self.df.loc[(niveau, str(code))]
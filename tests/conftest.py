@@ -0,0 +1,44 @@
+"""Équivalents minimaux des modules privés non versionnés (settings, functions._local_datetime...).
+
+Ils ne remplacent que les modules absents : sur le serveur du bot, les vrais modules sont utilisés.
+"""
+
+
+import asyncio, concurrent.futures, datetime, importlib.util, sys, types
+
+from benchmarks import parametres
+
+
+def module(nom, **attributs) -> None:
+    try:
+        present = importlib.util.find_spec(nom) is not None
+    except ModuleNotFoundError:
+        present = False
+    if not present:
+        sys.modules[nom] = types.ModuleType(nom)
+        sys.modules[nom].__dict__.update(attributs)
+
+
+class Threads:
+    '''Exécute la coroutine dans un thread, comme functions.a_threads.Threads.'''
+    def __init__(self, coroutine):
+        self.coroutine = coroutine
+
+    def __call__(self):
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            return executor.submit(asyncio.run, self.coroutine).result()
+
+
+async def local_dt():
+    return datetime.datetime.now()
+
+
+async def image_upload(image):
+    return 'https://example.invalid/image.png'
+
+
+module('settings', **{nom: valeur for nom, valeur in vars(parametres).items() if not nom.startswith('_')},
+       ROLE_CS='Admin', SALON_INFO_COVID=0, SALON_TEST_ADMIN=0, ID_BOT=0)
+module('functions._local_datetime', local_dt=local_dt, local_dt_sync=datetime.datetime.now)
+module('functions._image_upload', image_upload=image_upload)
+module('functions.a_threads', Threads=Threads)
@@ -0,0 +1,63 @@
+"""Serveur HTTP local qui imite data.gouv.fr, pour tester le téléchargement hors ligne (aiohttp.web)."""
+
+
+import re
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+
+@dataclass
+class FichierLocal:
+    contenu: bytes
+    etag:    str = None
+    range:   bool = True  # False : le serveur ignore l'en-tête Range et renvoie tout le fichier
+    tronque: bool = False  # True : la connexion est coupée au milieu du corps
+
+
+@dataclass
+class ServeurLocal:
+    '''/<nom> sert fichiers[nom] ; /redirection/<nom> redirige vers /<nom>, comme data.gouv.fr.'''
+    fichiers: dict = field(default_factory=dict)  # {nom: FichierLocal}
+    requetes: list = field(default_factory=list)  # [(chemin, en-têtes)] reçues
+
+    async def servir(self, request) -> web.StreamResponse:
+        self.requetes.append((request.path, dict(request.headers)))
+        if request.path.startswith('/redirection/'):
+            raise web.HTTPFound('/' + request.match_info['nom'])
+        fichier = self.fichiers.get(request.match_info['nom'])
+        if fichier is None:
+            raise web.HTTPNotFound()
+        headers = {'ETag': fichier.etag} if fichier.etag else {}
+        if fichier.etag and request.headers.get('If-None-Match') == fichier.etag:
+            return web.Response(status=304, headers=headers)
+
+        if fichier.range and (plage := re.fullmatch(r'bytes=(\d*)-(\d*)', request.headers.get('Range', ''))):
+            debut, fin = plage.groups()
+            taille = len(fichier.contenu)
+            debut, fin = (taille - int(fin), taille - 1) if not debut else (int(debut), min(int(fin or taille - 1), taille - 1))
+            headers['Content-Range'] = f'bytes {debut}-{fin}/{taille}'
+            return web.Response(status=206, body=fichier.contenu[debut:fin + 1], headers=headers)
+
+        if fichier.tronque:
+            response = web.StreamResponse(headers=headers)
+            response.content_length = len(fichier.contenu)
+            await response.prepare(request)
+            await response.write(fichier.contenu[:len(fichier.contenu) // 2])
+            request.transport.close()
+            return response
+        return web.Response(body=fichier.contenu, headers=headers)
+
+    @asynccontextmanager
+    async def demarrer(self):
+        app = web.Application()
+        app.router.add_get('/redirection/{nom}', self.servir)
+        app.router.add_get('/{nom}', self.servir)
+        async with TestServer(app) as serveur:
+            yield serveur
+
+    def entetes(self, nom) -> list:
+        '''En-têtes des requêtes reçues pour /<nom>.'''
+        return [headers for chemin, headers in self.requetes if chemin == f'/{nom}']
@@ -0,0 +1,30 @@
+import os
+
+from functions._cache_rendu import CacheRendu, cle_rendu
+
+
+def test_cle_stable():
+    assert cle_rendu('VaccinModele', ('dep', '92'), 'abc') == cle_rendu('VaccinModele', ('dep', '92'), 'abc')
+    assert cle_rendu('VaccinModele', ('dep', '92'), 'abc') != cle_rendu('VaccinModele', ('dep', '92'), 'abd')
+
+
+def test_lru_memoire(tmp_path):
+    '''Au-delà de nb_memoire, l'entrée la moins récemment lue quitte la mémoire, mais reste lue sur disque.'''
+    cache = CacheRendu(dossier=tmp_path, nb_memoire=2)
+    cache.ecrire('a', b'png a', '1 juin')
+    cache.ecrire('b', b'png b', '1 juin')
+    assert cache.lire('a').png == b'png a'  # a devient la plus récente.
+    cache.ecrire('c', b'png c', '1 juin')
+    assert list(cache.memoire) == ['a', 'c']
+    assert cache.lire('b').png == b'png b' and cache.succes == 2
+    assert cache.lire('absente') is None and cache.echecs == 1
+
+
+def test_budget_disque(tmp_path):
+    '''Au-delà du budget, les images les moins récemment utilisées sont supprimées du disque et de la mémoire.'''
+    cache = CacheRendu(dossier=tmp_path, budget_octets=150)
+    cache.ecrire('ancienne', b'x' * 100, '1 juin')
+    os.utime(tmp_path / 'ancienne.png', (1, 1))
+    cache.ecrire('recente', b'y' * 100, '2 juin')
+    assert sorted(fichier.name for fichier in tmp_path.iterdir()) == ['recente.json', 'recente.png']
+    assert 'ancienne' not in cache.memoire and cache.lire('ancienne') is None
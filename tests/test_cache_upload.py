@@ -0,0 +1,41 @@
+import asyncio
+
+from functions._cache_upload import CacheUpload, empreinte
+from view import views_embed as ve
+
+
+def test_cache_persistant(tmp_path):
+    cache = CacheUpload(fichier=tmp_path / 'uploads.json')
+    cle = empreinte(b'png')
+    assert cache.lire(cle) is None and cache.echecs == 1
+    cache.ecrire(cle, 'https://example.invalid/a.png')
+    assert cache.lire(cle) == 'https://example.invalid/a.png'
+    # Relu sur disque par une nouvelle instance, par ex. après un redémarrage
+    assert CacheUpload(fichier=tmp_path / 'uploads.json').lire(cle) == 'https://example.invalid/a.png'
+
+
+def test_expiration(tmp_path):
+    cache = CacheUpload(fichier=tmp_path / 'uploads.json', ttl=-1)
+    cache.ecrire(empreinte(b'png'), 'https://example.invalid/a.png')
+    assert cache.lire(empreinte(b'png')) is None
+
+
+def test_televersement_par_contenu(tmp_path, monkeypatch):
+    '''Une image identique octet pour octet n'est téléversée qu'une fois, qu'elle vienne de la mémoire ou du disque.'''
+    televersements = list()
+
+    async def image_upload(image):
+        televersements.append(image)
+        return f'https://example.invalid/{len(televersements)}.png'
+
+    monkeypatch.setattr(ve, 'image_upload', image_upload)
+    monkeypatch.setattr(ve, 'cache_upload', CacheUpload(fichier=tmp_path / 'uploads.json'))
+    fichier = tmp_path / 'image.png'
+    fichier.write_bytes(b'png a')
+
+    async def scenario():
+        return [await ve.upload_image_bdd(image, 'updates') for image in (b'png a', fichier, b'png a', b'png b')]
+
+    urls = asyncio.run(scenario())
+    assert urls == ['https://example.invalid/1.png'] * 3 + ['https://example.invalid/2.png']
+    assert len(televersements) == 2
@@ -0,0 +1,84 @@
+import asyncio
+from collections import Counter
+
+import pandas as pd
+
+from cogs import auto_covid_hospitalisation
+from functions._jeux_donnees import RegistreDonnees
+from functions._spf_ingestion import ingerer
+from functions._zones import REGION_PAR_DEPARTEMENT
+from model.cube_hospitalisation import agreger, CubeHospitalisation, MESURES
+
+
+CLES = ['dep', 'jour']
+
+
+def df(*lignes) -> pd.DataFrame:
+    '''Lignes (dep, jour, valeur) : toutes les mesures valent valeur.'''
+    df = pd.DataFrame([(dep, jour, *[float(valeur)] * len(MESURES)) for dep, jour, valeur in lignes],
+                      columns=['dep', 'jour', *MESURES])
+    df['jour'] = pd.to_datetime(df['jour'])
+    return df
+
+
+V1 = df(('92', '2022-06-01', 10), ('93', '2022-06-01', 20), ('13', '2022-06-01', 30),
+        ('92', '2022-06-02', 11), ('93', '2022-06-02', 21), ('13', '2022-06-02', 31))
+# Le 93 est révisé au 1er juin, et un jour est ajouté.
+V2 = df(('92', '2022-06-01', 10), ('93', '2022-06-01', 25), ('13', '2022-06-01', 30),
+        ('92', '2022-06-02', 11), ('93', '2022-06-02', 21), ('13', '2022-06-02', 31),
+        ('92', '2022-06-03', 12), ('93', '2022-06-03', 22), ('13', '2022-06-03', 32))
+
+
+class Fetcher:
+    '''SpfFetcher factice : sert la version publiée, et l'ingestion qui y mène depuis la précédente.'''
+    def __init__(self):
+        self.compteurs = Counter()
+        self.df = self.sha256 = self.ingestion_ = None
+
+    def publier(self, df, sha256) -> None:
+        if self.df is not None:
+            self.ingestion_ = ingerer(self.df, df, CLES, 'dep')
+            self.ingestion_.depuis = self.sha256
+        self.df, self.sha256 = df, sha256
+
+    def frais(self, url, revalidation) -> bool:
+        return False
+
+    async def __call__(self, url, revalidation, schema=None):
+        await asyncio.sleep(0)
+        return True, self.df
+
+    def empreinte(self, url) -> str:
+        return self.sha256
+
+    def ingestion(self, url):
+        return self.ingestion_
+
+
+def test_maj_cube_simultanees(monkeypatch):
+    '''Deux actualisations regroupées n'appliquent l'ingestion qu'une fois.'''
+    monkeypatch.setattr(auto_covid_hospitalisation, 'registre', RegistreDonnees(fetcher=Fetcher()))
+    fetcher = auto_covid_hospitalisation.registre.fetcher
+    cog = auto_covid_hospitalisation.AutoHopital(bot=None)
+
+    async def scenario():
+        fetcher.publier(V1, 'v1')
+        await cog.maj_cube()
+        fetcher.publier(V2, 'v2')
+        await asyncio.gather(cog.maj_cube(0), cog.maj_cube(0))
+
+    asyncio.run(scenario())
+    pd.testing.assert_frame_equal(cog.cube.df, agreger(V2, REGION_PAR_DEPARTEMENT))
+    assert cog.empreinte_cube == 'v2'
+
+
+def test_mise_a_jour_egale_reconstruction():
+    '''Un département révisé et un nouveau jour : la mise à jour incrémentale donne le cube reconstruit.'''
+    cube = CubeHospitalisation(regions=REGION_PAR_DEPARTEMENT)
+    cube.construire(V1)
+    ingestion = ingerer(V1, V2, CLES, 'dep')
+    assert ingestion.zones_revisees == {'93'} and not ingestion.complete
+    cube.mettre_a_jour(ingestion)
+    pd.testing.assert_frame_equal(cube.df, agreger(V2, REGION_PAR_DEPARTEMENT))
+    pd.testing.assert_frame_equal(cube.zone('reg', '11'), agreger(V2, REGION_PAR_DEPARTEMENT).loc[('reg', '11')],
+                                  check_freq=False)
@@ -0,0 +1,25 @@
+import io
+
+from PIL import Image
+
+from functions._gif import GifRotation
+
+
+def png(couleur) -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (320, 200), couleur).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def test_gif():
+    gif = GifRotation(duree=2)
+    for couleur in ('white', 'red', 'navy'):
+        gif.ajouter(png(couleur))
+    assert all(isinstance(image, bytes) for image in gif.images)  # Pas d'image RGB complète conservée
+
+    buffer = gif.enregistrer(io.BytesIO())
+    with Image.open(io.BytesIO(buffer.getvalue())) as resultat:
+        assert resultat.n_frames == 3 and resultat.size == (320, 200)
+        assert resultat.info['duration'] == 2000
+        resultat.seek(1)
+        assert resultat.convert('RGB').getpixel((0, 0)) == (255, 0, 0)
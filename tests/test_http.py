@@ -0,0 +1,92 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from functions._http import Telechargeur
+from tests.serveur_local import FichierLocal, ServeurLocal
+
+
+CONTENU = b'dep;jour;P;T;cl_age90\n' + b''.join(b'92;2022-06-%02d;10;100;0\n' % jour for jour in range(1, 31))
+
+
+def executer(serveur, tmp_path, scenario):
+    '''Lance scenario(telechargeur, url) contre le serveur local.'''
+    telechargeur = Telechargeur(dossier=tmp_path / 'tmp')
+
+    async def principal():
+        async with serveur.demarrer() as http:
+            try:
+                return await scenario(telechargeur, lambda chemin: str(http.make_url(chemin)))
+            finally:
+                await telechargeur.fermer()
+    return asyncio.run(principal())
+
+
+def test_200(tmp_path):
+    serveur = ServeurLocal({'csv': FichierLocal(CONTENU, etag='"v1"')})
+
+    async def scenario(telechargeur, url):
+        reponse = await telechargeur.telecharger(url('/csv'))
+        assert reponse.statut == 200 and reponse.etag == '"v1"'
+        assert reponse.chemin.read_bytes() == CONTENU
+        reponse.supprimer()
+        assert not reponse.chemin.exists()
+    executer(serveur, tmp_path, scenario)
+
+
+def test_304(tmp_path):
+    serveur = ServeurLocal({'csv': FichierLocal(CONTENU, etag='"v1"')})
+
+    async def scenario(telechargeur, url):
+        reponse = await telechargeur.telecharger(url('/csv'), {'If-None-Match': '"v1"'})
+        assert reponse.statut == 304 and reponse.chemin is None
+    executer(serveur, tmp_path, scenario)
+    assert not list((tmp_path / 'tmp').glob('*'))
+
+
+def test_redirection_conserve_en_tetes(tmp_path):
+    '''data.gouv.fr redirige vers static.data.gouv.fr : If-None-Match doit suivre la redirection.'''
+    serveur = ServeurLocal({'csv': FichierLocal(CONTENU, etag='"v1"')})
+
+    async def scenario(telechargeur, url):
+        reponse = await telechargeur.telecharger(url('/redirection/csv'), {'If-None-Match': '"v1"'})
+        assert reponse.statut == 304
+    executer(serveur, tmp_path, scenario)
+    assert serveur.entetes('csv')[-1]['If-None-Match'] == '"v1"'
+
+
+def test_flux_tronque(tmp_path):
+    '''Connexion coupée au milieu du corps : erreur, et aucun fichier temporaire conservé.'''
+    serveur = ServeurLocal({'csv': FichierLocal(CONTENU, tronque=True)})
+
+    async def scenario(telechargeur, url):
+        with pytest.raises(aiohttp.ClientError):
+            await telechargeur.telecharger(url('/csv'))
+    executer(serveur, tmp_path, scenario)
+    assert not list((tmp_path / 'tmp').glob('*'))
+
+
+def test_erreur_http(tmp_path):
+    async def scenario(telechargeur, url):
+        with pytest.raises(aiohttp.ClientResponseError):
+            await telechargeur.telecharger(url('/absent'))
+    executer(ServeurLocal(), tmp_path, scenario)
+
+
+def test_extrait(tmp_path):
+    serveur = ServeurLocal({'csv': FichierLocal(CONTENU)})
+
+    async def scenario(telechargeur, url):
+        assert await telechargeur.extrait(url('/csv'), 'bytes=-24') == CONTENU[-24:]
+        assert await telechargeur.extrait(url('/csv'), 'bytes=0-9') == CONTENU[:10]
+    executer(serveur, tmp_path, scenario)
+
+
+def test_extrait_sans_range(tmp_path):
+    '''Serveur qui ignore Range (réponse 200 complète) : None, l'appelant se rabat sur un téléchargement.'''
+    serveur = ServeurLocal({'csv': FichierLocal(CONTENU, range=False)})
+
+    async def scenario(telechargeur, url):
+        assert await telechargeur.extrait(url('/csv'), 'bytes=-24') is None
+    executer(serveur, tmp_path, scenario)
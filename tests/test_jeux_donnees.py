@@ -0,0 +1,42 @@
+import asyncio, time
+from collections import Counter
+
+from functions._jeux_donnees import RegistreDonnees
+
+
+class Fetcher:
+    '''SpfFetcher factice : chaque requête prend un tour de boucle et produit une nouvelle version.'''
+    def __init__(self):
+        self.requetes = 0
+        self.verifie_le = 0.
+        self.compteurs = Counter()
+
+    def frais(self, url, revalidation) -> bool:
+        return time.time() - self.verifie_le < revalidation
+
+    async def __call__(self, url, revalidation, schema=None):
+        self.requetes += 1
+        await asyncio.sleep(0)
+        self.verifie_le = time.time()
+        return True, f'df{self.requetes}'
+
+    def empreinte(self, url) -> str:
+        return f'v{self.requetes}'
+
+
+def test_actualisations_simultanees_regroupees():
+    registre = RegistreDonnees(fetcher=Fetcher())
+
+    async def scenario():
+        # Revalidations différentes (check_update : 0, commandes : REVALIDATION) : une seule requête.
+        await asyncio.gather(registre.actualiser('url', 0), registre.actualiser('url'), registre.actualiser('url', 0))
+        assert registre.fetcher.requetes == 1
+        # Version récente : servie sans requête, sauf revalidation forcée.
+        assert not await registre.actualiser('url')
+        assert registre.fetcher.requetes == 1
+        assert await registre.actualiser('url', 0)
+        assert registre.fetcher.requetes == 2
+
+    asyncio.run(scenario())
+    assert registre.empreinte('url') == 'v2'
+    assert list(registre.versions['url']) == ['v2']
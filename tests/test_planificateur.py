@@ -0,0 +1,83 @@
+import asyncio, datetime
+
+from functions import _planificateur
+from functions._planificateur import FUSEAU, Planificateur, Tache
+
+
+def compteur():
+    appels = list()
+
+    async def fonction():
+        appels.append(_planificateur.maintenant())
+    return fonction, appels
+
+
+def test_creneau_suivant():
+    tache = Tache('t', None, heures=range(18, 24), minutes={10, 40})
+    assert tache.creneau_suivant(datetime.datetime(2022, 6, 1, 17, 55, 30, tzinfo=FUSEAU)) == \
+           datetime.datetime(2022, 6, 1, 18, 10, tzinfo=FUSEAU)
+    assert tache.creneau_suivant(datetime.datetime(2022, 6, 1, 18, 10, tzinfo=FUSEAU)) == \
+           datetime.datetime(2022, 6, 1, 18, 40, tzinfo=FUSEAU)
+    assert tache.creneau_suivant(datetime.datetime(2022, 6, 1, 23, 45, tzinfo=FUSEAU)) == \
+           datetime.datetime(2022, 6, 2, 18, 10, tzinfo=FUSEAU)
+    assert Tache('t', None).creneau_suivant(datetime.datetime(2022, 6, 1, tzinfo=FUSEAU)) is None
+
+
+def test_une_fois_par_jour():
+    '''Un créneau échu n'est pas relancé le jour d'une exécution réussie.'''
+    reussie, appels_reussie = compteur()
+    a_faire, appels_a_faire = compteur()
+
+    async def scenario():
+        planificateur = Planificateur()
+        for nom, fonction in (('reussie', reussie), ('a_faire', a_faire)):
+            tache = planificateur.ajouter(Tache(nom, fonction, minutes=range(60), une_fois_par_jour=True))
+            tache.prochaine = _planificateur.maintenant() - datetime.timedelta(minutes=1)
+        planificateur.taches['reussie'].reussie_le = _planificateur.maintenant().date()
+        planificateur.reveil = asyncio.Event()
+        boucle = asyncio.create_task(planificateur.tourner())
+        await asyncio.sleep(.05)
+        boucle.cancel()
+        return planificateur
+
+    planificateur = asyncio.run(scenario())
+    assert not appels_reussie and len(appels_a_faire) == 1
+    assert planificateur.taches['a_faire'].reussie_le == _planificateur.maintenant().date()
+
+
+def test_delai_max():
+    '''Une exécution trop longue est annulée, et ne compte pas comme réussie.'''
+    async def lente():
+        await asyncio.sleep(10)
+
+    tache = Tache('lente', lente, delai_max=.01)
+    asyncio.run(Planificateur().executer(tache))
+    assert tache.reussie_le is None
+
+
+def test_jitter(monkeypatch):
+    '''Le retard aléatoire est tiré entre 0 et jitter secondes.'''
+    tirages = list()
+    monkeypatch.setattr(_planificateur.random, 'uniform', lambda a, b: tirages.append((a, b)) or 0)
+    fonction, appels = compteur()
+    tache = Tache('t', fonction, jitter=20)
+    asyncio.run(Planificateur().executer(tache))
+    assert tirages == [(0, 20)] and len(appels) == 1
+
+
+def test_remplacer():
+    '''Un nouveau déclenchement est ignoré pendant une exécution, sauf pour une tâche à remplacer.'''
+    async def scenario(remplacer):
+        planificateur = Planificateur()
+        tache = planificateur.ajouter(Tache('t', lambda: asyncio.sleep(10), remplacer=remplacer))
+        planificateur.declencher('t')
+        premiere = tache.execution
+        await asyncio.sleep(0)
+        planificateur.declencher('t')
+        await asyncio.sleep(0)
+        resultat = premiere.cancelled(), tache.execution is premiere
+        planificateur.arreter()
+        return resultat
+
+    assert asyncio.run(scenario(remplacer=False)) == (False, True)
+    assert asyncio.run(scenario(remplacer=True)) == (True, False)
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from functions._publications import empreinte_df, Publications
+
+
+def df(*valeurs, index=None) -> pd.DataFrame:
+    return pd.DataFrame({'jour': pd.date_range('2022-06-01', periods=len(valeurs)), 'hosp': valeurs}, index=index)
+
+
+def test_empreinte_stable():
+    '''Mêmes lignes et métadonnées : même empreinte, quel que soit l'index d'une tranche avec colonne 'jour'.'''
+    assert empreinte_df(df(1., 2., 3.), 'France', 1) == empreinte_df(df(1., 2., 3., index=[7, 8, 9]), 'France', 1)
+    assert empreinte_df(df(1., 2., 3.), 'France', 1) != empreinte_df(df(1., 2., 4.), 'France', 1)
+    assert empreinte_df(df(1., 2., 3.), 'France', 1) != empreinte_df(df(1., 2., 3.), 'France', 2)
+
+
+def test_empreinte_index_jour():
+    '''Tranche indexée par jour (model.cube_hospitalisation) : les jours font partie de l'empreinte.'''
+    tranche = df(1., 2., 3.).set_index('jour')
+    decalee = tranche.set_axis(tranche.index + pd.Timedelta(days=1))
+    assert empreinte_df(tranche) == empreinte_df(tranche.copy())
+    assert empreinte_df(tranche) != empreinte_df(decalee)
+
+
+def test_empreinte_jours():
+    '''Seuls les N derniers jours comptent : une révision plus ancienne ne change pas l'empreinte.'''
+    assert empreinte_df(df(1., 2., 3.), jours=2) == empreinte_df(df(9., 2., 3.), jours=2)
+    assert empreinte_df(df(1., 2., 3.), jours=2) != empreinte_df(df(1., 9., 3.), jours=2)
+    assert empreinte_df(df(1., 2., 3.).set_index('jour'), jours=2) == empreinte_df(df(9., 2., 3.).set_index('jour'), jours=2)
+
+
+def test_inchangee(tmp_path):
+    publications = Publications(fichier=tmp_path / 'publications.json')
+    assert not publications.inchangee('Hospitalisation-dep-92', 'abc')
+    publications.enregistrer('Hospitalisation-dep-92', 'abc')
+    assert publications.inchangee('Hospitalisation-dep-92', 'abc')
+    assert not publications.inchangee('Hospitalisation-dep-92', 'abd')
+    # Relu sur disque par une nouvelle instance, par ex. après un redémarrage
+    assert Publications(fichier=tmp_path / 'publications.json').inchangee('Hospitalisation-dep-92', 'abc')
@@ -0,0 +1,19 @@
+import asyncio, locale
+
+from functions import _rendu
+
+
+def test_locale_transmise_aux_processus(monkeypatch):
+    '''Les processus 'spawn' du pool reçoivent la locale du processus parent.'''
+    initiale = locale.setlocale(locale.LC_ALL)
+    monkeypatch.setattr(_rendu, 'NB_PROCESSUS', 1)
+    try:
+        locale.setlocale(locale.LC_ALL, 'C.UTF-8')
+        attendue = locale.setlocale(locale.LC_NUMERIC)
+        assert asyncio.run(_rendu.rendre(locale.setlocale, locale.LC_NUMERIC)) == attendue
+        # Mémoire relevée avec le rendu : actuelle, puis pic depuis le démarrage du processus.
+        [(residente, pic)] = _rendu.memoire_processus()
+        assert 0 < residente <= pic
+    finally:
+        _rendu.arreter()
+        locale.setlocale(locale.LC_ALL, initiale)
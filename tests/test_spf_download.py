@@ -0,0 +1,121 @@
+import asyncio, datetime
+
+import pytest
+
+from functions._http import Telechargeur
+from functions._spf_cache import SpfCache
+from functions._spf_download import SpfFetcher
+from tests.serveur_local import FichierLocal, ServeurLocal
+
+
+SCHEMA = ('sp-pos-quot', 'dep')
+
+
+def csv(*lignes) -> bytes:
+    return '\n'.join(['dep;jour;P;T;cl_age90', *lignes]).encode()
+
+
+JOUR_1 = csv('92;2022-06-01;10;100;0', '93;2022-06-01;20;200;0')
+JOUR_2 = csv('92;2022-06-01;10;100;0', '93;2022-06-01;20;200;0', '92;2022-06-02;11;110;0', '93;2022-06-02;21;210;0')
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    return SpfFetcher(http=Telechargeur(dossier=tmp_path / 'tmp'), cache=SpfCache(dossier=tmp_path / 'spf'))
+
+
+def test_en_tetes_retenus_apres_parsing(fetcher, monkeypatch):
+    '''Un échec après le téléchargement ne doit pas retenir l'ETag : sinon le 304 suivant masquerait le nouveau CSV.'''
+    serveur = ServeurLocal({'csv': FichierLocal(JOUR_1, etag='"v1"')})
+
+    async def scenario():
+        async with serveur.demarrer() as http:
+            url = str(http.make_url('/csv'))
+            modifie, df = await fetcher(url, schema=SCHEMA)
+            assert modifie and len(df) == 2
+
+            serveur.fichiers['csv'] = FichierLocal(JOUR_2, etag='"v2"')
+            ecrire = fetcher.cache.ecrire
+            def disque_plein(*args):
+                raise OSError('disque plein')
+            monkeypatch.setattr(fetcher.cache, 'ecrire', disque_plein)
+            with pytest.raises(OSError):
+                await fetcher(url, schema=SCHEMA)
+            assert fetcher.etat(url).etag == '"v1"'
+
+            monkeypatch.setattr(fetcher.cache, 'ecrire', ecrire)
+            modifie, df = await fetcher(url, schema=SCHEMA)
+            assert serveur.entetes('csv')[-1]['If-None-Match'] == '"v1"'
+            assert modifie and len(df) == 4
+            assert fetcher.etat(url).etag == '"v2"'
+            assert fetcher.cache.lire_meta(url)['etag'] == '"v2"'
+        await fetcher.http.fermer()
+
+    asyncio.run(scenario())
+
+
+def test_304_reutilise_df(fetcher):
+    serveur = ServeurLocal({'csv': FichierLocal(JOUR_1, etag='"v1"')})
+
+    async def scenario():
+        async with serveur.demarrer() as http:
+            url = str(http.make_url('/redirection/csv'))
+            modifie, df = await fetcher(url, schema=SCHEMA)
+            assert modifie
+            modifie, df_ = await fetcher(url, schema=SCHEMA)
+            assert not modifie and df_ is df
+            # Vérifié il y a moins de revalidation secondes : aucune requête.
+            nb_requetes = len(serveur.requetes)
+            assert (await fetcher(url, revalidation=60, schema=SCHEMA))[1] is df
+            assert len(serveur.requetes) == nb_requetes
+        await fetcher.http.fermer()
+
+    asyncio.run(scenario())
+    assert fetcher.compteurs == {'parsing': 1, '304': 1, 'memoire': 1}
+
+
+def test_contenu_identique_sans_etag(fetcher):
+    serveur = ServeurLocal({'csv': FichierLocal(JOUR_1)})
+
+    async def scenario():
+        async with serveur.demarrer() as http:
+            url = str(http.make_url('/csv'))
+            assert (await fetcher(url, schema=SCHEMA))[0]
+            assert not (await fetcher(url, schema=SCHEMA))[0]
+        await fetcher.http.fermer()
+
+    asyncio.run(scenario())
+    assert fetcher.compteurs['identique'] == 1
+
+
+def test_dernier_jour(fetcher):
+    serveur = ServeurLocal({'csv': FichierLocal(JOUR_2), 'sans-range': FichierLocal(JOUR_2, range=False)})
+
+    async def scenario():
+        async with serveur.demarrer() as http:
+            # Sonde plus courte que le fichier : la première ligne lue, tronquée, est ignorée.
+            assert await fetcher.dernier_jour(str(http.make_url('/csv')), octets=60) == datetime.date(2022, 6, 2)
+            assert await fetcher.dernier_jour(str(http.make_url('/sans-range'))) is None
+        await fetcher.http.fermer()
+
+    asyncio.run(scenario())
+
+
+def test_redemarrage(fetcher, tmp_path):
+    '''Après un redémarrage, le DF est restauré du cache disque et la requête reste conditionnelle.'''
+    serveur = ServeurLocal({'csv': FichierLocal(JOUR_1, etag='"v1"')})
+
+    async def scenario():
+        async with serveur.demarrer() as http:
+            url = str(http.make_url('/csv'))
+            _, df = await fetcher(url, schema=SCHEMA)
+            await fetcher.http.fermer()
+
+            redemarre = SpfFetcher(http=Telechargeur(dossier=tmp_path / 'tmp'), cache=SpfCache(dossier=tmp_path / 'spf'))
+            assert redemarre.etat(url).df is None  # Le DF n'est pas lu sur la boucle d'événements.
+            modifie, df_ = await redemarre(url, schema=SCHEMA)
+            assert not modifie and redemarre.compteurs['304'] == 1
+            assert df_.equals(df)
+            await redemarre.http.fermer()
+
+    asyncio.run(scenario())
@@ -0,0 +1,64 @@
+import pandas as pd
+
+from functions._spf_ingestion import ingerer
+
+
+CLES = ['dep', 'cl_age90', 'jour']
+
+
+def df(*lignes) -> pd.DataFrame:
+    df = pd.DataFrame(lignes, columns=['dep', 'jour', 'P', 'T', 'cl_age90'])
+    df['jour'] = pd.to_datetime(df['jour'])
+    return df
+
+
+ANCIEN = df(('92', '2022-06-01', 10, 100, 0), ('93', '2022-06-01', 20, 200, 0), ('94', '2022-06-01', 30, 300, 0),
+            ('92', '2022-06-02', 11, 110, 0), ('93', '2022-06-02', 21, 210, 0), ('94', '2022-06-02', 31, 310, 0))
+
+
+def trier(df) -> pd.DataFrame:
+    return df.sort_values(CLES).reset_index(drop=True)
+
+
+def test_nouveau_jour():
+    nouveau = pd.concat([ANCIEN, df(('92', '2022-06-03', 12, 120, 0), ('93', '2022-06-03', 22, 220, 0))])
+    ingestion = ingerer(ANCIEN, nouveau, CLES, 'dep')
+    assert not ingestion.complete and not ingestion.zones_revisees
+    assert len(ingestion.nouveaux) == 2
+    assert set(ingestion.nouveaux['dep']) == {'92', '93'}
+    pd.testing.assert_frame_equal(trier(ingestion.df), trier(nouveau))
+
+
+def test_ligne_revisee():
+    nouveau = ANCIEN.copy()
+    nouveau.loc[(nouveau['dep'] == '93') & (nouveau['jour'] == '2022-06-01'), 'P'] = 25
+    ingestion = ingerer(ANCIEN, nouveau, CLES, 'dep')
+    assert ingestion.zones_revisees == {'93'} and ingestion.nouveaux.empty
+    pd.testing.assert_frame_equal(trier(ingestion.df), trier(nouveau))
+
+
+def test_ligne_supprimee():
+    nouveau = ANCIEN[~((ANCIEN['dep'] == '94') & (ANCIEN['jour'] == '2022-06-01'))]
+    ingestion = ingerer(ANCIEN, nouveau, CLES, 'dep')
+    assert ingestion.zones_revisees == {'94'}
+    pd.testing.assert_frame_equal(trier(ingestion.df), trier(nouveau))
+
+
+def test_valeur_manquante_inchangee():
+    '''Deux cellules vides au même endroit ne sont pas une révision.'''
+    ancien = ANCIEN.astype({'P': 'Int32'})
+    ancien.loc[0, 'P'] = pd.NA
+    assert not ingerer(ancien, ancien.copy(), CLES, 'dep').zones_revisees
+
+
+def test_rechargement_complet():
+    assert ingerer(None, ANCIEN, CLES, 'dep').complete
+    assert ingerer(ANCIEN.drop(columns='T'), ANCIEN, CLES, 'dep').complete
+
+
+def test_categories_reunies():
+    ancien = ANCIEN.astype({'dep': 'category'})
+    nouveau = pd.concat([ANCIEN, df(('2A', '2022-06-03', 5, 50, 0))]).astype({'dep': 'category'})
+    ingestion = ingerer(ancien, nouveau, CLES, 'dep')
+    assert isinstance(ingestion.df['dep'].dtype, pd.CategoricalDtype)
+    assert set(ingestion.df['dep'].cat.categories) == {'92', '93', '94', '2A'}
@@ -0,0 +1,17 @@
+import io
+
+import pandas as pd
+
+from functions._spf_schemas import SCHEMAS
+
+
+CSV = ('dep;jour;P;T;cl_age90\n'
+       '01;2022-06-01;10;100;0\n'
+       '2A;2022-06-01;;;0\n')
+
+
+def test_cellules_vides_et_codes_texte():
+    df = SCHEMAS['sp-pos-quot'].lire_csv(io.StringIO(CSV), 'dep')
+    assert df['P'].isna().tolist() == [False, True]
+    assert isinstance(df['dep'].dtype, pd.CategoricalDtype)
+    assert set(df['dep'].cat.categories) == {'01', '2A'}
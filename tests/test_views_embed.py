@@ -0,0 +1,107 @@
+import asyncio, types
+
+import discord
+import pytest
+
+from view import views_embed as ve
+
+
+def erreur_http(status, retry_after='0') -> discord.errors.HTTPException:
+    reponse = types.SimpleNamespace(status=status, reason='', headers={'Retry-After': retry_after})
+    return discord.errors.HTTPException(reponse, 'erreur')
+
+
+class Message:
+    '''Message Discord factice : enregistre les embeds publiés, lève les erreurs prévues dans l'ordre.'''
+    def __init__(self, *erreurs):
+        self.erreurs = list(erreurs)
+        self.embeds = list()  # Sans attribut channel : aucun autre appel que edit() n'est possible.
+
+    async def edit(self, content=None, embed=None):
+        if self.erreurs:
+            raise self.erreurs.pop(0)
+        self.embeds.append(embed)
+
+
+@pytest.fixture
+def message(monkeypatch):
+    def creer(*erreurs):
+        msg = Message(*erreurs)
+
+        async def obtenir(bot, salon_id, message_id, rafraichir=False):
+            return msg
+
+        async def embed_prep(self):
+            self.embed_sans_image, self.embed, self.complet = 'sans image', 'avec image', True
+
+        monkeypatch.setattr(ve.cache_messages, 'obtenir', obtenir)
+        monkeypatch.setattr(ve.EmbedView, 'embed_prep', embed_prep)
+        return msg
+    return creer
+
+
+def test_edit_remonte_429(message):
+    msg = message(erreur_http(429))
+    with pytest.raises(discord.errors.HTTPException):
+        asyncio.run(ve.EmbedView(bot=None, salon_id=1, message_id=2).edit())
+    assert msg.embeds == []  # Pas de repli sur l'embed sans image
+
+
+def test_edit_repli_sans_image(message):
+    msg = message(erreur_http(400))
+    assert not asyncio.run(ve.EmbedView(bot=None, salon_id=1, message_id=2).edit())  # Publication incomplète
+    assert msg.embeds == ['sans image']
+
+
+def test_file_retente_429(message):
+    msg = message(erreur_http(429), erreur_http(429))
+    file = ve.FilePublication(intervalle=0)
+    assert asyncio.run(file.modifier(bot=None, salon_id=1, message_id=2))
+    assert msg.embeds == ['avec image']
+    assert file.profondeur == 0
+
+
+def test_file_abandonne_apres_essais(message):
+    message(*(erreur_http(429) for _ in range(3)))
+    with pytest.raises(discord.errors.HTTPException):
+        asyncio.run(ve.FilePublication(intervalle=0, essais=3).modifier(bot=None, salon_id=1, message_id=2))
+
+
+def test_attente():
+    assert ve.FilePublication.attente(erreur_http(429, '1.5')) == 1.5
+    assert ve.FilePublication.attente(erreur_http(429, None)) == 5.
+
+
+def test_file_regroupe_modifications(message):
+    '''Deux modifications du même message en attente : seule la dernière est publiée, la première est remplacée.'''
+    msg = message()
+    file = ve.FilePublication(intervalle=0)
+
+    async def scenario():
+        return await asyncio.gather(file.modifier(bot=None, salon_id=1, message_id=2, title='ancienne'),
+                                    file.modifier(bot=None, salon_id=1, message_id=2, title='récente'))
+
+    ancienne, recente = asyncio.run(scenario())
+    assert ancienne is ve.REMPLACEE and recente is True
+    assert msg.embeds == ['avec image']
+
+
+def test_edit_message_supprime(monkeypatch):
+    '''Message supprimé : 404 sur la modification puis sur la nouvelle résolution. Abandon, sans exception.'''
+    introuvable = lambda: discord.errors.NotFound(types.SimpleNamespace(status=404, reason=''), 'introuvable')
+    msg = Message(introuvable())
+    cache = ve.CacheMessages(messages={(1, 2): msg})
+
+    async def fetch_message(message_id):
+        raise introuvable()
+
+    bot = types.SimpleNamespace(get_channel=lambda salon_id: types.SimpleNamespace(fetch_message=fetch_message),
+                                add_listener=lambda *args: None)
+
+    async def embed_prep(self):
+        self.embed_sans_image, self.embed, self.complet = 'sans image', 'avec image', True
+
+    monkeypatch.setattr(ve, 'cache_messages', cache)
+    monkeypatch.setattr(ve.EmbedView, 'embed_prep', embed_prep)
+    assert asyncio.run(ve.EmbedView(bot=bot, salon_id=1, message_id=2).edit()) is False
+    assert msg.embeds == [] and cache.messages == {}
@@ -0,0 +1,14 @@
+from functions._zones import code_zone, CODE_FRANCE, DEPARTEMENTS, REGIONS, titre_zones, zone_publiee
+
+
+def test_hierarchie():
+    assert len(DEPARTEMENTS) == 101 and len(REGIONS) == 18
+    assert all(region in REGIONS for _, region in DEPARTEMENTS.values())
+
+
+def test_zones_publiees():
+    zones = (zone_publiee('fra', CODE_FRANCE, '#70E6E4'), zone_publiee('reg', '11', '#c7faff'),
+             zone_publiee('dep', 92, '#E3FFFF', particule='dans les'))
+    assert [zone.libelle for zone in zones] == ['France', 'Île-de-France', 'Hauts-de-Seine']
+    assert titre_zones(zones) == 'France · Île-de-France · 92'
+    assert code_zone('1') in DEPARTEMENTS and code_zone('2a') in DEPARTEMENTS
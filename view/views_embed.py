@@ -3,9 +3,9 @@ et la migration ultérieure vers une nouvelle bibliothèque.
 """
 
 
-import gc, os, sys
+import asyncio, gc, io, os, sys, time
 from copy import deepcopy
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import discord
@@ -13,15 +13,19 @@ import discord
 from functions._local_datetime import local_dt_sync
 from functions._image_upload import image_upload
 from functions.a_threads import Threads
+from functions._cache_upload import cache_upload, empreinte
+from functions._timer import mesure, mesures
+
+
+FIN_CHAMP = '\n\u200b'  # Ajouté à la valeur des champs (field_linebreak)
+REMPLACEE = None  # Résultat d'une modification remplacée par une plus récente avant publication (FilePublication)
 
 
 verif_droit = lambda ctx, role: discord.utils.get(ctx.author.roles, id=role)
 
-async def embed_edit_gc(*args, **kwargs) -> None:
-    embed = EmbedView(*args, **kwargs)
-    await embed.edit()
-    del embed
-    gc.collect()
+async def embed_edit_gc(*args, **kwargs) -> bool:
+    '''Modification du message, via la file de publication : voir FilePublication et EmbedView.edit().'''
+    return await file_publication.modifier(*args, **kwargs)
 
 async def embed_send_gc(*args, **kwargs) -> None:
     embed = EmbedView(*args, **kwargs)
@@ -32,6 +36,12 @@ async def embed_send_gc(*args, **kwargs) -> None:
 async def upload_image_bdd(image_path, image_bdd_table, image_keep=False) -> str:
     """Téléverser l'image sur un serveur distant et obtenir son url l'URL.
 
+    Args:
+        image_path (Path | str | bytes): Chemin de l'image, ou ses octets pour téléverser depuis la mémoire.
+
+    Note:
+        Les URL sont mises en cache par empreinte SHA-256 du contenu (functions._cache_upload).
+
     Returns:
         upload_link (str): URL de l'image.
 
@@ -39,12 +49,9 @@ async def upload_image_bdd(image_path, image_bdd_table, image_keep=False) -> str
         Exception générale.
     """
     try:
-        # Si le chemin est un :str:, convertir en :Path:
-        if not isinstance(image_path, Path):
-            image_path = Path(image_path)
-
         # Si on souhaite conserver l'image, vérifier si l'URL est déjà présente dans la BDD.
-        if image_keep:
+        if image_keep and not isinstance(image_path, (bytes, bytearray)):
+            image_path = Path(image_path)
             image_nom, image_ext = os.path.basename(image_path).rsplit('.', 1)
             image_dirpath = os.path.dirname(image_path)
             print('Vérification dans la BDD de l\'image : ', image_nom)
@@ -55,8 +62,17 @@ async def upload_image_bdd(image_path, image_bdd_table, image_keep=False) -> str
                           file_format=image_ext)
             return await image()  # URL
 
-        # Sinon, téléverser l'image et retourner l'URL.
-        return await image_upload(image_path)  # URL  # Todo : Logger
+        # Une image identique à une image déjà téléversée réutilise son URL.
+        en_memoire = isinstance(image_path, (bytes, bytearray))
+        contenu = image_path if en_memoire else Path(image_path).read_bytes()
+        cle = empreinte(contenu)
+        if url := cache_upload.lire(cle):
+            return url
+
+        # Sinon, téléverser l'image et retourner l'URL. Image en mémoire : téléversée sans passer par le disque.
+        url = await image_upload(io.BytesIO(contenu) if en_memoire else Path(image_path))  # URL  # Todo : Logger
+        cache_upload.ecrire(cle, url)
+        return url
 
     except Exception as err:
         exc_type, exc_obj, exc_tb = sys.exc_info()
@@ -77,13 +93,13 @@ class EmbedView:
     color_hex:            int = None
     url:                  str = None
     fields:               list = None
-    image_path:           Path = None
+    image_path:           Path = None  # Ou octets de l'image (bytes), sans fichier
     image_keep:           bool = False
     image_bdd_table:      str = 'updates'
     thumbnail_path:       Path = None
     thumbnail_keep:       bool = False
     thumbnail_bdd_table:  str = 'updates'
-    file:                 tuple = None
+    file:                 tuple = None  # (chemin ou io.BytesIO, nom du fichier)
     field_linebreak:      bool = True
 
     __slots__ = '__dict__',
@@ -108,7 +124,7 @@ class EmbedView:
                                   url=self.url,
                                   color=self.color_hex)
             if self.fields:  # [(Name, Value, True/False)]
-                linebreak = '\n\u200b'
+                linebreak = FIN_CHAMP
                 [self.embed.add_field(name=f'**{self.n}**', value=f'{self.v}{linebreak if self.field_linebreak else ""}', inline=self.i) for self.n, self.v, self.i in self.fields]
             self.embed.set_footer(text=self.footer)
             self.embed.timestamp = local_dt_sync()
@@ -121,13 +137,16 @@ class EmbedView:
     async def embed_prep(self) -> None:
         """Prépare l'embed, que ce soit pour self.edit ou self.send."""
         self.embed_sans_image = await self.create_embed()  # Créer l'embed sans image
+        self.complet = True  # False si une image ou une miniature n'a pas pu être téléversée
 
         if self.image_path or self.thumbnail_path:
             if self.image_path:
                 self.embed = deepcopy(self.embed_sans_image)  # Puis l'embed avec image
-                self.image_url = Threads(upload_image_bdd(self.image_path, self.image_bdd_table, self.image_keep))
-                image_url = self.image_url()
+                with mesure('upload'):
+                    self.image_url = Threads(upload_image_bdd(self.image_path, self.image_bdd_table, self.image_keep))
+                    image_url = self.image_url()
                 print(f'{image_url = }')
+                self.complet &= bool(image_url)
                 self.embed.set_image(url=image_url)
 
             if self.thumbnail_path:
@@ -135,37 +154,64 @@ class EmbedView:
                     self.embed = deepcopy(self.embed)
                 except Exception as err:  # Sinon, cet embed n'existe pas, donc copier l'embed sans image.
                     self.embed = deepcopy(self.embed_sans_image)
-                self.thumbnail_url = Threads(upload_image_bdd(self.thumbnail_path, self.thumbnail_bdd_table, self.thumbnail_keep))
-                thumbnail_url = self.thumbnail_url()
+                with mesure('upload'):
+                    self.thumbnail_url = Threads(upload_image_bdd(self.thumbnail_path, self.thumbnail_bdd_table, self.thumbnail_keep))
+                    thumbnail_url = self.thumbnail_url()
                 print(f'{thumbnail_url = }')
+                self.complet &= bool(thumbnail_url)
                 self.embed.set_thumbnail(url=thumbnail_url)
 
         else:
             self.embed = self.embed_sans_image
 
-    async def edit(self) -> None:
+    async def edit(self) -> bool:
         """Edition du message souhaité.
 
         Returns:
-            None
+            complet (bool): True si l'embed publié contient ses images, False s'il a été remplacé par l'embed sans image
+                            ou si le message a été supprimé.
 
         Raises:
+            discord.errors.HTTPException: Réponse 429, pour que l'appelant attende retry_after.
             Exception générale.
         """
-        self.msg = await self.bot.get_channel(self.salon_id).fetch_message(self.message_id)
-        async with self.msg.channel.typing():
-            await self.embed_prep()
+        # Message résolu une seule fois (CacheMessages) : la modification est le seul appel à l'API,
+        # sans indicateur de saisie (typing), qui consommerait la même limite de débit.
+        try:
+            self.msg = await cache_messages.obtenir(self.bot, self.salon_id, self.message_id)
+        except discord.errors.NotFound:
+            return self.message_supprime()
+        await self.embed_prep()
 
+        try:
             try:
-                await self.msg.edit(content=None, embed=self.embed)
-            except discord.errors.HTTPException as err:
-                print(err)
-                await self.msg.edit(content=None, embed=self.embed_sans_image)
-            except Exception as err:
-                exc_type, exc_obj, exc_tb = sys.exc_info()
-                fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
-                await self.msg.edit(content=None, embed=self.embed_sans_image)
-                raise Exception(err, exc_type, fname, exc_tb.tb_lineno)
+                with mesure('discord'):
+                    await self.msg.edit(content=None, embed=self.embed)
+            except discord.errors.NotFound:  # Message en cache périmé : résolu à nouveau, une fois.
+                try:
+                    self.msg = await cache_messages.obtenir(self.bot, self.salon_id, self.message_id, rafraichir=True)
+                except discord.errors.NotFound:
+                    return self.message_supprime()
+                with mesure('discord'):
+                    await self.msg.edit(content=None, embed=self.embed)
+            return self.complet
+        except discord.errors.HTTPException as err:
+            if err.status == 429:  # Limite de Discord : remontée pour être retentée par FilePublication.
+                raise
+            print(err)
+            await self.msg.edit(content=None, embed=self.embed_sans_image)
+            return False
+        except Exception as err:
+            exc_type, exc_obj, exc_tb = sys.exc_info()
+            fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
+            await self.msg.edit(content=None, embed=self.embed_sans_image)
+            raise Exception(err, exc_type, fname, exc_tb.tb_lineno)
+
+    def message_supprime(self) -> bool:
+        '''Message introuvable, même résolu à nouveau : retiré de CacheMessages, la modification est abandonnée.'''
+        cache_messages.oublier(self.salon_id, self.message_id)
+        print(f'Message {self.message_id} introuvable dans le salon {self.salon_id}.')
+        return False
 
     async def send(self) -> None:
         """Publie un nouveau message.
@@ -187,11 +233,11 @@ class EmbedView:
         async with self.msg.typing():
             await self.embed_prep()
 
-            if self.file:
-                self.file_discord = discord.File(self.file[0], filename=self.file[1])
+            self.file_discord = discord.File(self.file[0], filename=self.file[1]) if self.file else None
 
             try:
-                await self.msg.send(content=None, embed=self.embed, file=self.file_discord)
+                with mesure('discord'):
+                    await self.msg.send(content=None, embed=self.embed, file=self.file_discord)
             except discord.errors.HTTPException as err:
                 print(err)
                 await self.msg.edit(content=None, embed=self.embed_sans_image)
@@ -200,3 +246,144 @@ class EmbedView:
                 fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
                 await self.msg.send(content=None, embed=self.embed_sans_image)
                 raise Exception(err, exc_type, fname, exc_tb.tb_lineno)
+
+
+@dataclass
+class CacheMessages:
+    """Messages à modifier, résolus une fois par fetch_message puis réutilisés.
+
+    Note:
+        Un message est résolu à nouveau après une erreur 404, ou après une reconnexion à Discord (on_resumed,
+        ou on_ready des cogs via resoudre()).
+    """
+    messages: dict = field(default_factory=dict)  # {(salon_id, message_id): discord.Message}
+    ecoute:   bool = False  # Écouteur on_resumed ajouté au bot
+
+    __slots__ = '__dict__',
+
+    async def obtenir(self, bot, salon_id, message_id, rafraichir=False) -> discord.Message:
+        cle = (salon_id, message_id)
+        if rafraichir or cle not in self.messages:
+            if not self.ecoute:
+                bot.add_listener(self.vider, 'on_resumed')
+                self.ecoute = True
+            with mesure('discord'):
+                self.messages[cle] = await bot.get_channel(salon_id).fetch_message(message_id)
+        return self.messages[cle]
+
+    async def resoudre(self, bot, cles) -> None:
+        """Résout (à nouveau) les messages au démarrage, par ex. depuis on_ready.
+
+        Args:
+            cles (list): [(salon_id, message_id)]
+        """
+        await asyncio.gather(*(self.obtenir(bot, salon_id, message_id, rafraichir=True)
+                               for salon_id, message_id in cles))
+
+    def oublier(self, salon_id, message_id) -> None:
+        self.messages.pop((salon_id, message_id), None)
+
+    async def vider(self) -> None:
+        self.messages.clear()
+
+
+# Instance partagée par EmbedView
+cache_messages = CacheMessages()
+
+
+@dataclass
+class Modification:
+    '''Modification de message en attente dans la file.'''
+    args:       tuple
+    kwargs:     dict
+    future:     asyncio.Future
+    ajoutee_le: float = field(default_factory=time.perf_counter)
+
+
+@dataclass
+class FilePublication:
+    """File des modifications de messages, un travailleur par salon.
+
+    Note:
+        Discord limite les modifications par route, dont le paramètre majeur est le salon : les salons sont traités
+        en parallèle, et les modifications d'un même salon dans l'ordre. discord.py attend de lui-même d'après les
+        en-têtes X-RateLimit ; une réponse 429 remontée est retentée après retry_after.
+        Une modification encore en attente pour un message est remplacée par la plus récente (regroupement) :
+        l'appelant remplacé reçoit REMPLACEE, seul le dernier reçoit le résultat de la publication.
+    """
+    intervalle:   float = 1.  # Secondes minimales entre deux modifications d'un même salon
+    essais:       int = 3
+    files:        dict = field(default_factory=dict)  # {salon_id: asyncio.Queue de clés de message}
+    travailleurs: dict = field(default_factory=dict)  # {salon_id: asyncio.Task}
+    en_attente:   dict = field(default_factory=dict)  # {(salon_id, message_id): Modification}
+
+    __slots__ = '__dict__',
+
+    async def modifier(self, *args, **kwargs) -> bool:
+        """Ajoute la modification à la file du salon, et attend qu'elle soit publiée.
+
+        Args:
+            args, kwargs : Arguments de EmbedView, dont salon_id et message_id.
+
+        Returns:
+            complet (bool): Voir EmbedView.edit(). REMPLACEE si une modification plus récente du même message
+                            a été publiée à la place de celle-ci.
+        """
+        salon_id, message_id = kwargs.get('salon_id'), kwargs.get('message_id')
+        cle = (salon_id, message_id)
+        if modification := self.en_attente.get(cle):  # Pas encore commencée : seule la dernière version est publiée.
+            modification.future.set_result(REMPLACEE)
+            modification.args, modification.kwargs = args, kwargs
+            modification.future = asyncio.get_running_loop().create_future()
+        else:
+            modification = Modification(args, kwargs, asyncio.get_running_loop().create_future())
+            self.en_attente[cle] = modification
+            self.files.setdefault(salon_id, asyncio.Queue()).put_nowait(cle)
+            if salon_id not in self.travailleurs or self.travailleurs[salon_id].done():
+                self.travailleurs[salon_id] = asyncio.create_task(self.travailler(salon_id))
+        return await asyncio.shield(modification.future)
+
+    async def travailler(self, salon_id) -> None:
+        file = self.files[salon_id]
+        while not file.empty():
+            cle = file.get_nowait()
+            modification = self.en_attente.pop(cle)
+            mesures.enregistrer(('file_publication',), time.perf_counter() - modification.ajoutee_le)
+            try:
+                modification.future.set_result(await self.publier(modification))
+            except Exception as err:
+                modification.future.set_exception(err)
+            await asyncio.sleep(self.intervalle)
+
+    async def publier(self, modification) -> bool:
+        for essai in range(self.essais):
+            embed = EmbedView(*modification.args, **modification.kwargs)
+            try:
+                return await embed.edit()
+            except discord.errors.HTTPException as err:
+                if err.status != 429 or essai == self.essais - 1:
+                    raise
+                await asyncio.sleep(self.attente(err))
+            finally:
+                del embed
+                gc.collect()
+
+    @staticmethod
+    def attente(err, defaut=5.) -> float:
+        '''Secondes avant de retenter une modification refusée (429) : retry_after, ou l'en-tête Retry-After.'''
+        retry_after = getattr(err, 'retry_after', None)
+        if retry_after is None:
+            retry_after = getattr(getattr(err, 'response', None), 'headers', {}).get('Retry-After')
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            return defaut
+
+    @property
+    def profondeur(self) -> int:
+        '''Modifications en attente, tous salons confondus.'''
+        return len(self.en_attente)
+
+
+# Instance partagée par les cogs
+file_publication = FilePublication()